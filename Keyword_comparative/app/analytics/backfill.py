@@ -0,0 +1,112 @@
+"""
+Batch job keeping the keyword rollups complete without anyone fetching each
+conversation: matches every conversation of a project (fuzzy mode, like the
+request path) that has no rollup yet, or whose rollup predates the last change
+of the project's keyword set, and folds it into the rollups.
+
+    python -m app.analytics.backfill                  # every project
+    python -m app.analytics.backfill --project-id 12 --day 2024-05-01
+
+Date semantics: conversations carry no call timestamp, so a conversation's
+counts are filed under the day it is first rolled up - by this job (today, or
+``--day`` to file a historical batch under its call date) or by a match
+request, whichever comes first - and recomputations keep that day. Run the job
+right after transcriptions are loaded (e.g. nightly) to make "day" track the
+call date; with the job scheduled, ANALYTICS_ROLLUPS_ENABLED=False keeps the
+match endpoints read-only.
+"""
+import argparse
+import logging
+import sys
+from datetime import date
+from typing import Dict, Optional
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.analytics.rollups import record_match_rollups
+from app.database.models import Conversation, Keyword, KeywordRollupSource, Project, Transcription
+from app.matching.compiler import load_keyword_set
+from app.matching.engine import AGENT_SPEAKER, CUSTOMER_SPEAKER, FUZZY, match_keywords
+
+logger = logging.getLogger(__name__)
+
+
+def pending_conversations(session: Session, project_id: int, builder_name: str, keyword_updated_on):
+    """Conversation ids of a project that have no rollup, or one older than the keyword set."""
+    query = session.query(Conversation.conversation_id).outerjoin(
+        KeywordRollupSource,
+        and_(KeywordRollupSource.conversation_id == Conversation.conversation_id,
+             KeywordRollupSource.project_id == project_id,
+             KeywordRollupSource.builder_name == builder_name)
+    ).filter(Conversation.project_id == project_id)
+    stale = KeywordRollupSource.conversation_id.is_(None)
+    if keyword_updated_on is not None:
+        stale = or_(stale, KeywordRollupSource.updated_on < keyword_updated_on)
+    return [row.conversation_id for row in query.filter(stale).order_by(Conversation.conversation_id)]
+
+
+def backfill_project(session: Session, project_id: int, builder_name: str,
+                     day: Optional[date] = None) -> Dict[str, int]:
+    """Roll up every pending conversation of one project; one commit per conversation."""
+    keyword_obj = session.query(Keyword).filter_by(project_id=project_id, builder_name=builder_name).first()
+    if not keyword_obj or not keyword_obj.keywords:
+        return {"conversations": 0, "skipped": 0}
+    keyword_set = load_keyword_set(keyword_obj)
+
+    done = skipped = 0
+    for conversation_id in pending_conversations(session, project_id, builder_name, keyword_obj.updated_on):
+        conversation = session.query(Conversation).filter_by(conversation_id=conversation_id).first()
+        transcription = session.query(Transcription).filter_by(conversation_id=conversation_id).first()
+        if not transcription or not transcription.transcript_text:
+            skipped += 1
+            continue
+        result = match_keywords(keyword_set, transcription.diarized_segments or [],
+                                AGENT_SPEAKER, CUSTOMER_SPEAKER, mode=FUZZY)
+        try:
+            record_match_rollups(session, conversation_id, conversation.agent_id,
+                                 project_id, builder_name, result, day=day)
+        except Exception:
+            session.rollback()
+            logger.warning("Could not roll up conversation %s", conversation_id, exc_info=True)
+            skipped += 1
+            continue
+        done += 1
+        session.expunge_all()  # keep memory flat over large projects
+    return {"conversations": done, "skipped": skipped}
+
+
+def backfill(session: Session, project_id: Optional[int] = None, day: Optional[date] = None) -> Dict[int, Dict[str, int]]:
+    """Backfill one project, or all of them."""
+    query = session.query(Project).order_by(Project.id)
+    if project_id is not None:
+        query = query.filter(Project.id == project_id)
+    projects = [(project.id, project.builder_name) for project in query]
+
+    totals = {}
+    for pid, builder_name in projects:
+        totals[pid] = backfill_project(session, pid, builder_name, day=day)
+        logger.info("Rollup backfill for project %s (%s): %s", pid, builder_name, totals[pid])
+    return totals
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.analytics.backfill",
+                                     description="Backfill keyword analytics rollups")
+    parser.add_argument("--project-id", type=int, help="only this project (default: all)")
+    parser.add_argument("--day", type=date.fromisoformat,
+                        help="file newly rolled-up conversations under this day (default: today)")
+    args = parser.parse_args(argv)
+
+    from app.database.database import TranscriptionSessionLocal
+    from app.logging_config import setup_logging
+
+    setup_logging()
+    with TranscriptionSessionLocal() as session:
+        totals = backfill(session, project_id=args.project_id, day=args.day)
+    print({pid: counts for pid, counts in totals.items()})
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
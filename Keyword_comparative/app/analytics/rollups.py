@@ -0,0 +1,203 @@
+import logging
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.database.models import KeywordHitRollup, KeywordRollupSource
+
+logger = logging.getLogger(__name__)
+
+# (category, keyword, speaker_role) -> hits
+Contribution = Dict[Tuple[str, str, str], int]
+
+
+def contribution_from_matches(matched_keywords: List[Dict[str, Any]]) -> Contribution:
+    """Collapse a ``matched_Keywords`` result into non-zero hit counts per (category, keyword, role)."""
+    contribution = defaultdict(int)
+    for category_entry in matched_keywords:
+        category = category_entry["category"]
+        for keyword_entry in category_entry["keywords"]:
+            for role, data in keyword_entry["countBySpeaker"].items():
+                if data["count"]:
+                    contribution[(category, keyword_entry["keyword"], role)] += data["count"]
+    return dict(contribution)
+
+
+def _encode(contribution: Contribution) -> List[list]:
+    return [[category, keyword, role, hits] for (category, keyword, role), hits in contribution.items()]
+
+
+def _decode(rows) -> Contribution:
+    return {(category, keyword, role): hits for category, keyword, role, hits in rows or []}
+
+
+def _insert_for(session: Session):
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Rollup upserts are not supported on {dialect}")
+    return insert
+
+
+def _apply_delta(session: Session, insert, key_values: Dict[str, Any], hit_delta: int, conversation_delta: int) -> None:
+    stmt = insert(KeywordHitRollup).values(
+        **key_values, hit_count=hit_delta, conversation_count=conversation_delta)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["project_id", "builder_name", "category", "keyword", "agent_id", "speaker_role", "day"],
+        set_={
+            "hit_count": KeywordHitRollup.hit_count + stmt.excluded.hit_count,
+            "conversation_count": KeywordHitRollup.conversation_count + stmt.excluded.conversation_count,
+        })
+    session.execute(stmt)
+
+
+def _source_unchanged(session: Session, conversation_id: str, project_id: int, builder_name: str,
+                      agent_id: str, new: Contribution) -> bool:
+    source = session.query(KeywordRollupSource.agent_id, KeywordRollupSource.contribution).filter_by(
+        conversation_id=conversation_id, project_id=project_id, builder_name=builder_name).first()
+    return source is not None and source.agent_id == agent_id and _decode(source.contribution) == new
+
+
+def record_match_rollups(
+    session: Session,
+    conversation_id: str,
+    agent_id: Optional[str],
+    project_id: int,
+    builder_name: str,
+    matched_keywords: List[Dict[str, Any]],
+    day: Optional[date] = None,
+    read_session: Optional[Session] = None
+) -> None:
+    """
+    Fold one conversation's match result into the rollup tables.
+
+    The previous contribution of the same (conversation, project, builder) is
+    subtracted first, so recomputing a match (e.g. after the keyword set
+    changed) replaces its counts instead of adding them twice.
+
+    Date semantics: conversations carry no call timestamp, so a conversation's
+    counts are filed under the day it was first rolled up (``day`` when given,
+    e.g. by the backfill job, otherwise today) and stay on that day when it is
+    recomputed later.
+
+    With ``read_session`` (e.g. a replica session) an unchanged contribution is
+    detected there first, so re-fetching a conversation does not write to, or
+    lock rows on, the primary.
+    """
+    new = contribution_from_matches(matched_keywords)
+    agent_id = agent_id or ""
+    if read_session is not None and _source_unchanged(read_session, conversation_id, project_id, builder_name,
+                                                      agent_id, new):
+        return
+
+    insert = _insert_for(session)
+    # Claim the source row first: concurrent first matches of the same conversation
+    # then serialize on the row lock below instead of racing on the insert
+    session.execute(insert(KeywordRollupSource).values(
+        conversation_id=conversation_id, project_id=project_id, builder_name=builder_name,
+        agent_id=agent_id, day=day or datetime.utcnow().date(), contribution=[]
+    ).on_conflict_do_nothing(index_elements=["conversation_id", "project_id", "builder_name"]))
+    source = session.query(KeywordRollupSource).filter_by(
+        conversation_id=conversation_id, project_id=project_id, builder_name=builder_name
+    ).with_for_update().one()
+
+    old = _decode(source.contribution)
+    day = source.day
+    old_agent_id = source.agent_id
+    if old == new and old_agent_id == agent_id:
+        source.updated_on = datetime.utcnow()  # still current for the keyword set in use
+        session.commit()
+        return
+
+    # Old contribution out, new one in (a changed agent_id moves the counts between agents)
+    for (category, keyword, role), hits in old.items():
+        _apply_delta(session, insert, {
+            "project_id": project_id, "builder_name": builder_name, "category": category,
+            "keyword": keyword, "agent_id": old_agent_id, "speaker_role": role, "day": day,
+        }, -hits, -1)
+    for (category, keyword, role), hits in new.items():
+        _apply_delta(session, insert, {
+            "project_id": project_id, "builder_name": builder_name, "category": category,
+            "keyword": keyword, "agent_id": agent_id, "speaker_role": role, "day": day,
+        }, hits, 1)
+
+    source.contribution = _encode(new)
+    source.agent_id = agent_id
+    source.updated_on = datetime.utcnow()
+    session.commit()
+
+
+def safe_record_match_rollups(session: Session, *args, **kwargs) -> None:
+    """Rollups are best effort: a failure is logged and never fails the match request."""
+    try:
+        record_match_rollups(session, *args, **kwargs)
+    except Exception:
+        session.rollback()
+        logger.warning("Could not update keyword rollups", exc_info=True)
+
+
+def query_keyword_analytics(
+    session: Session,
+    project_id: int,
+    builder_name: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    agent_id: Optional[str] = None,
+    category: Optional[str] = None
+) -> Dict[str, Any]:
+    """Sum the rollups over a date range, grouped by category / keyword / agent / speaker role."""
+    filters = [KeywordHitRollup.project_id == project_id]
+    if builder_name:
+        filters.append(func.lower(KeywordHitRollup.builder_name) == builder_name.strip().lower())
+    if date_from:
+        filters.append(KeywordHitRollup.day >= date_from)
+    if date_to:
+        filters.append(KeywordHitRollup.day <= date_to)
+    if agent_id is not None:
+        filters.append(KeywordHitRollup.agent_id == agent_id)
+    if category:
+        filters.append(KeywordHitRollup.category == category)
+
+    rows = session.query(
+        KeywordHitRollup.category,
+        KeywordHitRollup.keyword,
+        KeywordHitRollup.agent_id,
+        KeywordHitRollup.speaker_role,
+        func.sum(KeywordHitRollup.hit_count).label("hits"),
+        func.sum(KeywordHitRollup.conversation_count).label("conversations"),
+    ).filter(*filters).group_by(
+        KeywordHitRollup.category,
+        KeywordHitRollup.keyword,
+        KeywordHitRollup.agent_id,
+        KeywordHitRollup.speaker_role,
+    ).all()
+
+    categories = defaultdict(lambda: {"Agent": 0, "Customer": 0})
+    breakdown = []
+    for row in rows:
+        hits = int(row.hits or 0)
+        if hits <= 0:
+            continue
+        categories[row.category][row.speaker_role] = categories[row.category].get(row.speaker_role, 0) + hits
+        breakdown.append({
+            "category": row.category,
+            "keyword": row.keyword,
+            "agent_id": row.agent_id or None,
+            "speaker": row.speaker_role,
+            "count": hits,
+            "conversations": int(row.conversations or 0),
+        })
+
+    return {
+        "totals_by_category": [
+            {"category": name, "countBySpeaker": counts, "total": sum(counts.values())}
+            for name, counts in sorted(categories.items())
+        ],
+        "keywords": breakdown,
+    }
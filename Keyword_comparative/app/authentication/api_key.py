@@ -1,11 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, Body
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import uuid
 
-from app.database.database import get_db
+from app.database.database import get_db, get_read_db
 from app.database.models import APIKey
-from app.authentication.authen import generate_api_key, get_api_key
+from app.authentication.authen import forget_api_keys, generate_api_key, get_api_key
 from app.authentication.config import settings
 from pydantic import BaseModel
 from datetime import datetime
@@ -15,15 +15,21 @@ class APIKeyCreate(BaseModel):
     owner_name: str
     owner_email: str
     description: str = None
+    rate_limit_per_minute: Optional[int] = None
+    rate_limit_burst: Optional[int] = None
+    max_concurrent_requests: Optional[int] = None
 
 class APIKeyInfo(BaseModel):
     key_id: str
     owner_name: str
-    owner_email: str
-    description: str = None
+    owner_email: Optional[str] = None
+    description: Optional[str] = None
     is_active: bool
     created_at: datetime
-    last_used: datetime = None
+    last_used: Optional[datetime] = None
+    rate_limit_per_minute: Optional[int] = None
+    rate_limit_burst: Optional[int] = None
+    max_concurrent_requests: Optional[int] = None
 
 class APIKeyResponse(BaseModel):
     key_id: str
@@ -34,7 +40,7 @@ class APIKeyResponse(BaseModel):
 app = APIRouter()
 
 @app.post("/keys", response_model=APIKeyResponse)
-async def create_api_key(
+def create_api_key(
     key_data: APIKeyCreate,
     db: Session = Depends(get_db),
     _: str = Depends(get_api_key)  # Only admins can create keys (currently any authenticated user)
@@ -52,6 +58,9 @@ async def create_api_key(
         owner_name=key_data.owner_name,
         owner_email=key_data.owner_email,
         description=key_data.description,
+        rate_limit_per_minute=key_data.rate_limit_per_minute,
+        rate_limit_burst=key_data.rate_limit_burst,
+        max_concurrent_requests=key_data.max_concurrent_requests,
         is_active=True,
         created_at=datetime.utcnow()
     )
@@ -68,8 +77,8 @@ async def create_api_key(
     }
 
 @app.get("/keys", response_model=List[APIKeyInfo])
-async def list_api_keys(
-    db: Session = Depends(get_db),
+def list_api_keys(
+    db: Session = Depends(get_read_db),
     _: str = Depends(get_api_key)  # Only authenticated users can list keys
 ):
     """List all API keys (without showing the actual keys)."""
@@ -77,7 +86,7 @@ async def list_api_keys(
     return keys
 
 @app.put("/keys/{key_id}/deactivate")
-async def deactivate_api_key(
+def deactivate_api_key(
     key_id: str,
     db: Session = Depends(get_db),
     _: str = Depends(get_api_key)  # Only authenticated users can deactivate keys
@@ -89,11 +98,12 @@ async def deactivate_api_key(
     
     key.is_active = False
     db.commit()
+    forget_api_keys(key_id)
     
     return {"message": f"API key {key_id} deactivated successfully"}
 
 @app.put("/keys/{key_id}/activate")
-async def activate_api_key(
+def activate_api_key(
     key_id: str,
     db: Session = Depends(get_db),
     _: str = Depends(get_api_key)  # Only authenticated users can activate keys
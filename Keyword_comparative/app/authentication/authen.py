@@ -1,10 +1,13 @@
-from fastapi import Depends, HTTPException, Security
+from fastapi import Depends, HTTPException, Security, Request
 from fastapi.security.api_key import APIKeyHeader
 from starlette.status import HTTP_403_FORBIDDEN
 import secrets
 import logging
+import threading
+import time
+from datetime import datetime
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from app.database.database import get_db
 from app.authentication.config import settings 
 from app.database.models import APIKey
@@ -16,17 +19,26 @@ logger = logging.getLogger(__name__)
 API_KEY_NAME = "X-API-Key"
 api_key_header = APIKeyHeader(name=API_KEY_NAME, auto_error=False)
 
+# API key -> (expires_at, KeyLimits) of recently validated keys, so repeat requests
+# of a key skip the database (and the last_used write) for API_KEY_CACHE_TTL_SECONDS
+_validated_keys: Dict[str, Tuple[float, "KeyLimits"]] = {}
+_validated_keys_lock = threading.Lock()
+
 # Function to generate new API keys
 def generate_api_key() -> str:
     """Generate a secure random API key."""
     return secrets.token_urlsafe(32)
 
 # Function to validate API key
-async def get_api_key(
+def get_api_key(
+    request: Request,
     api_key_header: str = Security(api_key_header),
     db: Session = Depends(get_db)
 ) -> str:
-    """Validate API key from header."""
+    """
+    Validate API key from header. A plain function on purpose: FastAPI runs it in
+    its threadpool, so the database lookup never blocks the event loop.
+    """
     if api_key_header is None:
         raise HTTPException(
             status_code=HTTP_403_FORBIDDEN, 
@@ -35,31 +47,74 @@ async def get_api_key(
 
     # If we're in dev/test mode and using the master key, allow access
     if settings.ENVIRONMENT in ["development", "testing"] and api_key_header == settings.MASTER_API_KEY:
-        logger.info("Access granted using master API key")
+        logger.debug("Access granted using master API key")
+        request.state.api_key_limits = key_limits("master")
         return api_key_header
     
-    # Check against database of valid API keys
-    from app.database.models import APIKey
-    
+    limits = _cached_limits(api_key_header)
+    if limits is None:
+        limits = _validate_api_key(api_key_header, db)
+    request.state.api_key_limits = limits
+    return api_key_header
+
+
+def _cached_limits(api_key: str):
+    with _validated_keys_lock:
+        cached = _validated_keys.get(api_key)
+    if cached is None or cached[0] < time.monotonic():
+        return None
+    return cached[1]
+
+
+def _validate_api_key(api_key_header: str, db: Session):
+    """Check the key against the database; only valid keys are cached."""
     api_key = db.query(APIKey).filter(
         APIKey.key == api_key_header,
         APIKey.is_active == True
     ).first()
-    
+
     if not api_key:
-        logger.warning(f"Invalid API key attempt: {api_key_header[:8]}...")
+        logger.warning("Invalid API key attempt: %s...", api_key_header[:8])
         raise HTTPException(
             status_code=HTTP_403_FORBIDDEN, 
             detail="Invalid or inactive API key"
         )
-    
+
+    # Read everything needed before the commit expires the row, so nothing reloads it
+    # (and checks a connection out again) for the rest of the request
+    limits = key_limits(api_key.key_id, api_key)
+
     # Update last used timestamp
-    from datetime import datetime
     api_key.last_used = datetime.utcnow()
     db.commit()
-    
-    logger.info(f"Authenticated request with key ID: {api_key.key_id}")
-    return api_key_header 
+
+    logger.debug("Authenticated request with key ID: %s", limits.key_id)
+    if settings.API_KEY_CACHE_TTL_SECONDS > 0:
+        with _validated_keys_lock:
+            _validated_keys[api_key_header] = (time.monotonic() + settings.API_KEY_CACHE_TTL_SECONDS, limits)
+    return limits
+
+
+def forget_api_keys(key_id: Optional[str] = None) -> None:
+    """Drop cached validations (of one key_id, or all), e.g. after a key is deactivated."""
+    with _validated_keys_lock:
+        for api_key, (_, limits) in list(_validated_keys.items()):
+            if key_id is None or limits.key_id == key_id:
+                del _validated_keys[api_key]
+
+def key_limits(key_id: str, api_key: Optional[APIKey] = None):
+    """Rate limit settings of a key; columns left NULL fall back to the defaults in settings."""
+    from app.authentication.rate_limit import KeyLimits
+
+    def pick(value, default):
+        return default if value is None else value
+
+    return KeyLimits(
+        key_id=key_id,
+        rate_per_minute=pick(getattr(api_key, "rate_limit_per_minute", None), settings.DEFAULT_RATE_LIMIT_PER_MINUTE),
+        burst=pick(getattr(api_key, "rate_limit_burst", None), settings.DEFAULT_RATE_LIMIT_BURST),
+        max_concurrency=pick(getattr(api_key, "max_concurrent_requests", None), settings.DEFAULT_MAX_CONCURRENT_REQUESTS),
+    )
 
 #to get an Owner name who are currenty using the API key
 
@@ -16,10 +16,72 @@ class Settings(BaseSettings):
     DB_NAME: str = os.getenv("DB_NAME", "advincidb")
     DB_USER: str = os.getenv("DB_USER", "advenadmin")
     DB_PASSWORD: str = os.getenv("DB_PASSWORD", "")
+    # Full SQLAlchemy URL of the primary, overrides the DB_* values when set (e.g. sqlite:///primary.db)
+    DATABASE_URL: str = os.getenv("DATABASE_URL", "")
+    # Comma-separated SQLAlchemy URLs of read replicas, empty = read from the primary
+    READ_REPLICA_URLS: str = os.getenv("READ_REPLICA_URLS", "")
+    REPLICA_MAX_LAG_SECONDS: float = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+    REPLICA_LAG_CHECK_INTERVAL_SECONDS: float = float(os.getenv("REPLICA_LAG_CHECK_INTERVAL_SECONDS", "10"))
+    STARTUP_INDEX_CHECK: bool = os.getenv("STARTUP_INDEX_CHECK", "True").lower() in ("true", "1", "t")
 
     MASTER_API_KEY: str = os.getenv("MASTER_API_KEY", "dev-master-key-never-use-in-production")
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")  # "development", "testing", "production"
     AUTH_REQUIRED: bool = os.getenv("AUTH_REQUIRED", "True").lower() in ("true", "1", "t")
+
+    # Logging: "json" or "text"; INFO/DEBUG logs of a request are kept with this probability (warnings and errors always)
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")
+    LOG_INFO_SAMPLE_RATE: float = float(os.getenv("LOG_INFO_SAMPLE_RATE", "1.0"))
+
+    # Traffic recording for load tests (app/loadtest): JSONL file of anonymized requests, empty = off.
+    # Ids and free text are replaced by salted hashes; set a fixed salt so several workers produce matching tokens.
+    LOADTEST_RECORD_PATH: str = os.getenv("LOADTEST_RECORD_PATH", "")
+    LOADTEST_RECORD_SAMPLE_RATE: float = float(os.getenv("LOADTEST_RECORD_SAMPLE_RATE", "1.0"))
+    LOADTEST_ANONYMIZE_SALT: str = os.getenv("LOADTEST_ANONYMIZE_SALT", "")
+
+    # Rate limiting / admission control
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "True").lower() in ("true", "1", "t")
+    DEFAULT_RATE_LIMIT_PER_MINUTE: int = int(os.getenv("DEFAULT_RATE_LIMIT_PER_MINUTE", "120"))
+    DEFAULT_RATE_LIMIT_BURST: int = int(os.getenv("DEFAULT_RATE_LIMIT_BURST", "30"))
+    DEFAULT_MAX_CONCURRENT_REQUESTS: int = int(os.getenv("DEFAULT_MAX_CONCURRENT_REQUESTS", "2"))
+    # Validated keys and their limits are cached per worker for this long (0 disables);
+    # a deactivated key stays usable on other workers until its entry expires
+    API_KEY_CACHE_TTL_SECONDS: float = float(os.getenv("API_KEY_CACHE_TTL_SECONDS", "30"))
+    MATCHING_MAX_IN_FLIGHT: int = int(os.getenv("MATCHING_MAX_IN_FLIGHT", "8"))
+    MATCHING_MAX_QUEUE: int = int(os.getenv("MATCHING_MAX_QUEUE", "32"))
+    BULK_MAX_IN_FLIGHT: int = int(os.getenv("BULK_MAX_IN_FLIGHT", "2"))
+    BULK_MAX_QUEUE: int = int(os.getenv("BULK_MAX_QUEUE", "4"))
+    ADMISSION_MAX_WAIT_SECONDS: float = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "10"))
+    ADMISSION_RETRY_AFTER_SECONDS: int = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "5"))
+
+    # Keep keyword analytics rollups up to date as matches are computed
+    ANALYTICS_ROLLUPS_ENABLED: bool = os.getenv("ANALYTICS_ROLLUPS_ENABLED", "True").lower() in ("true", "1", "t")
+
+    # Keyword set compilation limits
+    KEYWORD_MIN_LENGTH: int = int(os.getenv("KEYWORD_MIN_LENGTH", "2"))
+    KEYWORD_MAX_LENGTH: int = int(os.getenv("KEYWORD_MAX_LENGTH", "200"))
+    KEYWORD_MAX_COUNT: int = int(os.getenv("KEYWORD_MAX_COUNT", "2000"))
+    KEYWORD_MAX_CATEGORIES: int = int(os.getenv("KEYWORD_MAX_CATEGORIES", "100"))
+
+    # Chunked matching of long transcripts
+    SEGMENT_CHUNK_SIZE: int = int(os.getenv("SEGMENT_CHUNK_SIZE", "500"))
+    MAX_EXAMPLE_TEXTS_PER_KEYWORD: int = int(os.getenv("MAX_EXAMPLE_TEXTS_PER_KEYWORD", "20"))
+
+    # Semantic matching (optional, needs the sentence-transformers package)
+    SEMANTIC_MODEL_NAME: str = os.getenv("SEMANTIC_MODEL_NAME", "sentence-transformers/all-MiniLM-L6-v2")
+    SEMANTIC_THRESHOLD: float = float(os.getenv("SEMANTIC_THRESHOLD", "0.6"))
+    EMBEDDING_CACHE_MAX_ENTRIES: int = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "2048"))
+    # Embedding matrices grow with transcript length, so the in-memory cache is bounded by size as well
+    EMBEDDING_CACHE_MAX_BYTES: int = int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+    # Response cache ("memory", "redis" or "none")
+    RESPONSE_CACHE_BACKEND: str = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+    RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+    # Total size of the in-memory cache per worker, and the largest single body worth caching
+    RESPONSE_CACHE_MAX_BYTES: int = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+    RESPONSE_CACHE_MAX_ENTRY_BYTES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRY_BYTES", str(8 * 1024 * 1024)))
+    RESPONSE_CACHE_TTL_SECONDS: int = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+    REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
     
     # Configure Pydantic to ignore extra fields
     model_config = {
@@ -0,0 +1,192 @@
+import asyncio
+import math
+import time
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from fastapi import Depends, Request
+from fastapi.responses import JSONResponse
+from starlette.status import HTTP_429_TOO_MANY_REQUESTS
+
+from app.authentication.authen import get_api_key
+from app.authentication.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Priority classes: interactive calls are only rate limited, matching and bulk
+# work additionally go through a bounded admission gate and per-key concurrency caps.
+INTERACTIVE = "interactive"
+MATCHING = "matching"
+BULK = "bulk"
+
+
+@dataclass
+class KeyLimits:
+    """Limits of one API key, taken from the APIKey row (or the defaults in settings)."""
+    key_id: str
+    rate_per_minute: int
+    burst: int
+    max_concurrency: int
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _KeyState:
+    __slots__ = ("tat", "in_flight")
+
+    def __init__(self):
+        self.tat = 0.0  # theoretical arrival time of the next request (GCRA)
+        self.in_flight = 0
+
+
+class KeyRateLimiter:
+    """
+    Per-key token bucket (implemented as GCRA: one timestamp per key) plus an
+    in-flight counter for heavy work.
+
+    All methods are called from async dependencies, i.e. on the event loop
+    thread, so the state is never touched concurrently and needs no locks.
+    """
+
+    def __init__(self):
+        self._keys: Dict[str, _KeyState] = {}
+
+    def _state(self, key_id: str) -> _KeyState:
+        state = self._keys.get(key_id)
+        if state is None:
+            state = self._keys[key_id] = _KeyState()
+        return state
+
+    def check_rate(self, limits: KeyLimits, now: Optional[float] = None) -> None:
+        if limits.rate_per_minute <= 0:
+            return
+        now = time.monotonic() if now is None else now
+        interval = 60.0 / limits.rate_per_minute
+        state = self._state(limits.key_id)
+        new_tat = max(state.tat, now) + interval
+        allowed_at = new_tat - interval * max(limits.burst, 1)
+        if allowed_at > now:
+            raise AdmissionRejected("rate limit exceeded", allowed_at - now)
+        state.tat = new_tat
+
+    def acquire_slot(self, limits: KeyLimits) -> None:
+        state = self._state(limits.key_id)
+        if limits.max_concurrency > 0 and state.in_flight >= limits.max_concurrency:
+            raise AdmissionRejected("too many concurrent requests for this API key",
+                                    settings.ADMISSION_RETRY_AFTER_SECONDS)
+        state.in_flight += 1
+
+    def release_slot(self, limits: KeyLimits) -> None:
+        state = self._state(limits.key_id)
+        state.in_flight = max(state.in_flight - 1, 0)
+
+
+class PriorityGate:
+    """
+    Bounded admission gate for one priority class: at most ``max_in_flight``
+    requests run, at most ``max_queue`` wait (FIFO), anything beyond is shed.
+    """
+
+    def __init__(self, name: str, max_in_flight: int, max_queue: int, max_wait: float):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self._waiters = deque()
+
+    async def acquire(self) -> None:
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise AdmissionRejected(f"{self.name} queue is saturated", settings.ADMISSION_RETRY_AFTER_SECONDS)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # release() hands its slot straight to the waiter, in_flight is not touched
+            await asyncio.wait_for(waiter, timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+            raise AdmissionRejected(f"{self.name} queue wait timed out", settings.ADMISSION_RETRY_AFTER_SECONDS)
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight = max(self.in_flight - 1, 0)
+
+
+rate_limiter = KeyRateLimiter()
+priority_gates = {
+    MATCHING: PriorityGate(MATCHING, settings.MATCHING_MAX_IN_FLIGHT, settings.MATCHING_MAX_QUEUE,
+                           settings.ADMISSION_MAX_WAIT_SECONDS),
+    BULK: PriorityGate(BULK, settings.BULK_MAX_IN_FLIGHT, settings.BULK_MAX_QUEUE,
+                       settings.ADMISSION_MAX_WAIT_SECONDS),
+}
+
+
+async def admission_rejected_handler(request: Request, rejection: AdmissionRejected) -> JSONResponse:
+    """Exception handler rendering a shed request as a 429 in the API's usual error shape."""
+    retry_after = max(int(math.ceil(rejection.retry_after)), 1)
+    return JSONResponse(
+        content={"Error code": "ERR-1008",
+                 "Error message": f"Request rejected: {rejection.reason}",
+                 "Retry after": retry_after},
+        status_code=HTTP_429_TOO_MANY_REQUESTS,
+        headers={"Retry-After": str(retry_after)})
+
+
+def rate_limited_key(priority: str = INTERACTIVE):
+    """
+    Dependency factory replacing ``Depends(get_api_key)`` on rate limited endpoints.
+    Authenticates the key, applies its token bucket and, for heavy priority
+    classes, its concurrency cap and the class admission gate. Yields the key.
+    """
+
+    async def dependency(request: Request, api_key: str = Depends(get_api_key)):
+        if not settings.RATE_LIMIT_ENABLED:
+            yield api_key
+            return
+
+        limits = request.state.api_key_limits
+        gate = priority_gates.get(priority)
+        try:
+            rate_limiter.check_rate(limits)
+            if gate is None:
+                slot_held = gate_held = False
+            else:
+                rate_limiter.acquire_slot(limits)
+                slot_held = True
+                try:
+                    await gate.acquire()
+                except AdmissionRejected:
+                    rate_limiter.release_slot(limits)
+                    raise
+                gate_held = True
+        except AdmissionRejected as rejection:  # rendered by admission_rejected_handler
+            logger.warning("Shedding %s request for key %s: %s", priority, limits.key_id, rejection.reason)
+            raise
+
+        try:
+            yield api_key
+        finally:
+            if gate_held:
+                gate.release()
+            if slot_held:
+                rate_limiter.release_slot(limits)
+
+    return dependency
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from app.authentication.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# Base class every cache backend implements
+class ResponseCache:
+    """Stores serialized response bodies keyed by their ETag."""
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+
+class NullResponseCache(ResponseCache):
+    """Cache backend that never stores anything (RESPONSE_CACHE_BACKEND=none)."""
+
+    def get(self, key: str) -> Optional[bytes]:
+        return None
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None) -> None:
+        return None
+
+    def delete(self, key: str) -> None:
+        return None
+
+
+class LRUResponseCache(ResponseCache):
+    """
+    In-process LRU cache with an optional per-entry TTL, bounded both by entry
+    count and by the total size of the stored bodies. Bodies larger than
+    ``max_entry_bytes`` are not cached at all (one multi-hour transcript must
+    not evict everything else).
+    """
+
+    def __init__(self, max_entries: int = 1024, default_ttl: Optional[int] = None,
+                 max_bytes: Optional[int] = None, max_entry_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _pop(self, key: str, last: Optional[bool] = None) -> None:
+        # callers hold the lock
+        if last is None:
+            entry = self._entries.pop(key, None)
+        else:
+            key, entry = self._entries.popitem(last=last)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None) -> None:
+        ttl = ttl if ttl is not None else self.default_ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._pop(key)
+            if self.max_entry_bytes is not None and len(value) > self.max_entry_bytes:
+                return
+            self._entries[key] = (expires_at, value)
+            self._bytes += len(value)
+            while len(self._entries) > self.max_entries or \
+                    (self.max_bytes is not None and self._bytes > self.max_bytes):
+                self._pop(None, last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+
+class RedisResponseCache(ResponseCache):
+    """
+    Cache backed by any client exposing the redis-py ``get``/``set(ex=)``/``delete`` calls.
+    A small in-memory fake with the same three methods is enough to exercise it locally.
+    """
+
+    def __init__(self, client: Any, prefix: str = "kwcache:", default_ttl: Optional[int] = None,
+                 max_entry_bytes: Optional[int] = None):
+        self.client = client
+        self.prefix = prefix
+        self.default_ttl = default_ttl
+        self.max_entry_bytes = max_entry_bytes
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self.client.get(self.prefix + key)
+        except Exception:
+            # A cache outage must never fail the request, just fall back to computing it
+            logger.warning("Response cache read failed", exc_info=True)
+            return None
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None) -> None:
+        ttl = ttl if ttl is not None else self.default_ttl
+        if self.max_entry_bytes is not None and len(value) > self.max_entry_bytes:
+            return
+        try:
+            self.client.set(self.prefix + key, value, ex=ttl or None)
+        except Exception:
+            logger.warning("Response cache write failed", exc_info=True)
+
+    def delete(self, key: str) -> None:
+        try:
+            self.client.delete(self.prefix + key)
+        except Exception:
+            logger.warning("Response cache delete failed", exc_info=True)
+
+
+def build_response_cache(backend: str = None) -> ResponseCache:
+    """Create the cache backend selected in settings."""
+    backend = (backend or settings.RESPONSE_CACHE_BACKEND).lower()
+    ttl = settings.RESPONSE_CACHE_TTL_SECONDS or None
+
+    if backend == "none":
+        return NullResponseCache()
+    if backend == "redis":
+        import redis  # optional dependency, only needed for the shared cache
+
+        client = redis.Redis.from_url(settings.REDIS_URL)
+        return RedisResponseCache(client, default_ttl=ttl, max_entry_bytes=settings.RESPONSE_CACHE_MAX_ENTRY_BYTES)
+    return LRUResponseCache(max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES, default_ttl=ttl,
+                            max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+                            max_entry_bytes=settings.RESPONSE_CACHE_MAX_ENTRY_BYTES)
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide response cache, creating it on first use."""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = build_response_cache()
+    return _response_cache
+
+
+def set_response_cache(cache: ResponseCache) -> None:
+    """Swap the process-wide cache (e.g. for a fake Redis client)."""
+    global _response_cache
+    _response_cache = cache
+
+
+# ETag helpers
+
+# Bump whenever the shape of a cached response body changes (e.g. a new field), so
+# clients revalidate and bodies cached under the old shape (also in Redis) are never served
+RESPONSE_FORMAT_VERSION = 2
+
+
+def make_etag(*parts: Any) -> str:
+    """Build a strong ETag from the values that identify a response's content (and the response format)."""
+    digest = hashlib.sha1("|".join(str(p) for p in (RESPONSE_FORMAT_VERSION, *parts)).encode("utf-8")).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header value against an ETag (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def serialize_body(content: Any) -> bytes:
+    """Serialize a JSON response body once so it can be cached and replayed byte-for-byte."""
+    return json.dumps(content, default=str, separators=(",", ":")).encode("utf-8")
@@ -1,27 +1,120 @@
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import time
+import logging
+import itertools
+from fastapi import Depends
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session, sessionmaker
 from dotenv import load_dotenv
 from urllib.parse import quote_plus
 
+from app.authentication.config import settings
+
 load_dotenv()
+logger = logging.getLogger(__name__)
 
 # Azure PostgreSQL DB (Transcription DB)
 DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = quote_plus(os.getenv("DB_PASSWORD"))
+DB_PASSWORD = quote_plus(os.getenv("DB_PASSWORD", ""))
 DB_HOST = os.getenv("DB_HOST")
 DB_PORT = os.getenv("DB_PORT")
 DB_NAME = os.getenv("DB_NAME")
 
-TRANSCRIPTION_DB_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+TRANSCRIPTION_DB_URL = settings.DATABASE_URL or f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 transcription_engine = create_engine(TRANSCRIPTION_DB_URL)
 TranscriptionSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=transcription_engine)
 
+# Read replicas (optional). Read-only endpoints use them, writes always go to the primary above.
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+_REPLICA_LAG_SQL = text(
+    "SELECT CASE "
+    "WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END")
+
+
+def measure_replica_lag(engine) -> float:
+    """Replication lag of a replica in seconds (0 for databases without replication, e.g. SQLite files)."""
+    if engine.dialect.name != "postgresql":
+        return 0.0
+    with engine.connect() as connection:
+        return float(connection.execute(_REPLICA_LAG_SQL).scalar() or 0)
+
+
+class ReplicaRouter:
+    """
+    Picks the engine for a read-only session: replicas in round robin, skipping
+    any whose lag is above ``max_lag`` (or that cannot be probed), and the
+    primary when no replica qualifies. Lag is re-measured at most every
+    ``check_interval`` seconds per replica.
+    """
+
+    def __init__(self, primary, replicas, max_lag: float, check_interval: float, lag_probe=measure_replica_lag):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.lag_probe = lag_probe
+        self._lag = {}  # replica index -> (checked_at, lag or None when unreachable)
+        self._next = itertools.count()
+
+    def _replica_lag(self, index: int):
+        checked = self._lag.get(index)
+        now = time.monotonic()
+        if checked is not None and now - checked[0] < self.check_interval:
+            return checked[1]
+        try:
+            lag = self.lag_probe(self.replicas[index])
+        except Exception:
+            logger.warning("Could not measure lag of read replica #%d", index, exc_info=True)
+            lag = None
+        self._lag[index] = (now, lag)
+        return lag
+
+    def pick(self):
+        if not self.replicas:
+            return self.primary
+        start = next(self._next)
+        for offset in range(len(self.replicas)):
+            index = (start + offset) % len(self.replicas)
+            lag = self._replica_lag(index)
+            if lag is not None and lag <= self.max_lag:
+                return self.replicas[index]
+        logger.warning("No read replica within the lag threshold, reading from the primary")
+        return self.primary
+
+
+replica_engines = [
+    create_engine(url.strip(), pool_pre_ping=True)
+    for url in settings.READ_REPLICA_URLS.split(",") if url.strip()
+]
+replica_router = ReplicaRouter(
+    transcription_engine, replica_engines,
+    max_lag=settings.REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.REPLICA_LAG_CHECK_INTERVAL_SECONDS)
+
 def get_db():
-    """Get a database session."""
+    """Get a database session (primary, use for anything that writes)."""
     db = TranscriptionSessionLocal()
     try:
         yield db
     finally:
         db.close()
 
+def get_read_db(primary: Session = Depends(get_db)):
+    """
+    Get a read-only database session, routed to a read replica when one is
+    configured and fresh enough. Otherwise the request's primary session (the
+    one get_api_key already uses) is reused, so a request never holds two
+    primary connections.
+    """
+    engine = replica_router.pick()
+    if engine is replica_router.primary:
+        yield primary
+        return
+    db = ReadSessionLocal(bind=engine)
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,68 @@
+import logging
+from typing import Dict, List
+
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger(__name__)
+
+# Tables whose lookups sit on the request hot path
+HOT_PATH_TABLES = ("projects", "conversations", "transcriptions", "keywords")
+
+# Hot-path indexes created by the migrations (0001_hot_path_indexes). The other
+# indexes declared on the models (ix_projects_id, ix_projects_name, ix_keywords_id)
+# predate Alembic and "alembic upgrade head" would not create them, so they are not checked.
+MIGRATION_INDEXES = {
+    "projects": ["ix_projects_id_builder_name"],
+    "conversations": ["ix_conversations_project_id"],
+    "transcriptions": ["ix_transcriptions_conversation_id"],
+    "keywords": ["ix_keywords_project_id_lower_builder_name"],
+}
+
+
+def expected_indexes(tables=HOT_PATH_TABLES) -> Dict[str, List[str]]:
+    """Index names the migrations create, per table."""
+    return {table_name: sorted(MIGRATION_INDEXES.get(table_name, ())) for table_name in tables}
+
+
+def _present_indexes(engine, inspector, table_name: str):
+    if engine.dialect.name == "sqlite":
+        # the SQLite inspector skips expression indexes such as lower(builder_name)
+        with engine.connect() as connection:
+            rows = connection.execute(
+                text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table"),
+                {"table": table_name})
+            return {row[0] for row in rows}
+    return {index["name"] for index in inspector.get_indexes(table_name)}
+
+
+def find_missing_indexes(engine, tables=HOT_PATH_TABLES) -> Dict[str, List[str]]:
+    """
+    Compare the declared indexes with the ones present in the database.
+    Returns {table: [missing index names]} for tables that are missing any.
+    """
+    inspector = inspect(engine)
+    missing = {}
+    for table_name, names in expected_indexes(tables).items():
+        if not inspector.has_table(table_name):
+            missing[table_name] = names
+            continue
+        present = _present_indexes(engine, inspector, table_name)
+        absent = [name for name in names if name not in present]
+        if absent:
+            missing[table_name] = absent
+    return missing
+
+
+def check_indexes(engine) -> Dict[str, List[str]]:
+    """Startup check: log missing hot-path indexes instead of failing the boot."""
+    try:
+        missing = find_missing_indexes(engine)
+    except Exception:
+        logger.warning("Could not inspect database indexes", exc_info=True)
+        return {}
+
+    for table_name, names in missing.items():
+        logger.warning("Missing indexes on '%s': %s (run 'alembic upgrade head')", table_name, ", ".join(names))
+    if not missing:
+        logger.info("All hot-path indexes are present")
+    return missing
@@ -0,0 +1,46 @@
+"""Add indexes for the hot lookup paths
+
+Revision ID: 0001_hot_path_indexes
+Revises:
+Create Date: 2026-10-19
+
+The tables already exist in production, so this revision only adds indexes.
+They are built CONCURRENTLY so the 2M-row transcriptions table stays writable.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001_hot_path_indexes"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_transcriptions_conversation_id", "transcriptions", ["conversation_id"],
+            postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(
+            "ix_conversations_project_id", "conversations", ["project_id"],
+            postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(
+            "ix_projects_id_builder_name", "projects", ["id", "builder_name"],
+            postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(
+            "ix_keywords_project_id_lower_builder_name", "keywords",
+            ["project_id", sa.text("lower(builder_name)")],
+            postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_keywords_project_id_lower_builder_name", table_name="keywords",
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index("ix_projects_id_builder_name", table_name="projects",
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index("ix_conversations_project_id", table_name="conversations",
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index("ix_transcriptions_conversation_id", table_name="transcriptions",
+                      postgresql_concurrently=True, if_exists=True)
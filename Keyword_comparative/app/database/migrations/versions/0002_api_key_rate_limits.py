@@ -0,0 +1,27 @@
+"""Add per-key rate limit and concurrency columns to api_keys
+
+Revision ID: 0002_api_key_rate_limits
+Revises: 0001_hot_path_indexes
+Create Date: 2026-10-19
+
+NULL values fall back to the DEFAULT_* limits in settings.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002_api_key_rate_limits"
+down_revision = "0001_hot_path_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("api_keys", sa.Column("rate_limit_per_minute", sa.Integer(), nullable=True))
+    op.add_column("api_keys", sa.Column("rate_limit_burst", sa.Integer(), nullable=True))
+    op.add_column("api_keys", sa.Column("max_concurrent_requests", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("api_keys", "max_concurrent_requests")
+    op.drop_column("api_keys", "rate_limit_burst")
+    op.drop_column("api_keys", "rate_limit_per_minute")
@@ -0,0 +1,51 @@
+"""Add keyword analytics rollup tables
+
+Revision ID: 0003_keyword_rollups
+Revises: 0002_api_key_rate_limits
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0003_keyword_rollups"
+down_revision = "0002_api_key_rate_limits"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "keyword_hit_rollups",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("project_id", sa.Integer(), nullable=False),
+        sa.Column("builder_name", sa.String(), nullable=False),
+        sa.Column("category", sa.String(), nullable=False),
+        sa.Column("keyword", sa.String(), nullable=False),
+        sa.Column("agent_id", sa.String(100), nullable=False, server_default=""),
+        sa.Column("speaker_role", sa.String(20), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("hit_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("conversation_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.UniqueConstraint("project_id", "builder_name", "category", "keyword", "agent_id", "speaker_role", "day",
+                            name="unique_keyword_hit_rollup"),
+    )
+    op.create_index("ix_keyword_hit_rollups_project_builder_day", "keyword_hit_rollups",
+                    ["project_id", "builder_name", "day"])
+
+    op.create_table(
+        "keyword_rollup_sources",
+        sa.Column("conversation_id", sa.String(100), primary_key=True),
+        sa.Column("project_id", sa.Integer(), primary_key=True),
+        sa.Column("builder_name", sa.String(), primary_key=True),
+        sa.Column("agent_id", sa.String(100), nullable=False, server_default=""),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("contribution", postgresql.JSONB(), nullable=False),
+        sa.Column("updated_on", sa.DateTime()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("keyword_rollup_sources")
+    op.drop_index("ix_keyword_hit_rollups_project_builder_day", table_name="keyword_hit_rollups")
+    op.drop_table("keyword_hit_rollups")
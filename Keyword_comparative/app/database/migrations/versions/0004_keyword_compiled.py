@@ -0,0 +1,25 @@
+"""Add the precompiled keyword artifact column
+
+Revision ID: 0004_keyword_compiled
+Revises: 0003_keyword_rollups
+Create Date: 2026-10-19
+
+Existing rows keep compiled = NULL and are compiled on read until their
+keywords are next replaced.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0004_keyword_compiled"
+down_revision = "0003_keyword_rollups"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("keywords", sa.Column("compiled", postgresql.JSONB(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("keywords", "compiled")
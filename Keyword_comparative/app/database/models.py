@@ -1,7 +1,7 @@
-from sqlalchemy import Column, String, ForeignKey, Text, Integer,DateTime, Boolean, TIMESTAMP
+from sqlalchemy import Column, String, ForeignKey, Text, Integer,DateTime, Boolean, TIMESTAMP, Date
 from sqlalchemy.dialects.postgresql import JSON,JSONB
 from datetime import datetime
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import UniqueConstraint, Index, func
 from sqlalchemy.orm import relationship, declarative_base
 
 # Define Base
@@ -31,12 +31,17 @@ class Project(Base):
     conversations = relationship("Conversation", back_populates="project")
     calls = relationship("CallAnalysis", back_populates="project")  # works now ✅
 
+    __table_args__ = (
+        # lookups validate the (id, builder_name) pair together
+        Index("ix_projects_id_builder_name", "id", "builder_name"),
+    )
+
 # Conversation (uses project_id ForeignKey)
 class Conversation(Base):
     __tablename__ = "conversations"
     conversation_id = Column(String(100), primary_key=True)
     agent_id = Column(String(100))
-    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False, index=True)
 
     transcriptions = relationship("Transcription", back_populates="conversation")
     project = relationship("Project", back_populates="conversations")
@@ -45,7 +50,7 @@ class Conversation(Base):
 class Transcription(Base):
     __tablename__ = "transcriptions"
     transcription_id = Column(String(100), primary_key=True)
-    conversation_id = Column(String(100), ForeignKey("conversations.conversation_id"))
+    conversation_id = Column(String(100), ForeignKey("conversations.conversation_id"), index=True)
     transcript_text = Column(Text)
     diarized_segments = Column(JSONB)
 
@@ -59,6 +64,7 @@ class Keyword(Base):
     project_id = Column(Integer, nullable=False)
     builder_name = Column(String, nullable=False)
     keywords = Column(JSONB, nullable=False)  # Now this will store: { "Category": [keyword1, keyword2] }
+    compiled = Column(JSONB)  # precompiled matching artifact built from `keywords` on write (see app/matching/compiler.py)
     created_on = Column(DateTime, default=datetime.utcnow)
     created_by = Column(String)
     updated_on = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -66,11 +72,47 @@ class Keyword(Base):
 
     __table_args__ = (
         UniqueConstraint('project_id', 'builder_name', name='unique_builder_project'),
+        # case-insensitive builder lookups (func.lower(builder_name) == ...)
+        Index('ix_keywords_project_id_lower_builder_name', 'project_id', func.lower(builder_name)),
     )
 
 
-    
-    
+
+# Keyword analytics rollups: hit counts per project / builder / category / keyword /
+# agent / speaker role / day, maintained incrementally whenever matches are computed
+class KeywordHitRollup(Base):
+    __tablename__ = "keyword_hit_rollups"
+
+    id = Column(Integer, primary_key=True)
+    project_id = Column(Integer, nullable=False)
+    builder_name = Column(String, nullable=False)
+    category = Column(String, nullable=False)
+    keyword = Column(String, nullable=False)
+    agent_id = Column(String(100), nullable=False, default="")
+    speaker_role = Column(String(20), nullable=False)  # "Agent" / "Customer"
+    day = Column(Date, nullable=False)
+    hit_count = Column(Integer, nullable=False, default=0)
+    conversation_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint('project_id', 'builder_name', 'category', 'keyword', 'agent_id', 'speaker_role', 'day',
+                         name='unique_keyword_hit_rollup'),
+        Index('ix_keyword_hit_rollups_project_builder_day', 'project_id', 'builder_name', 'day'),
+    )
+
+# What each conversation last contributed to the rollups, so re-matching replaces it instead of double counting
+class KeywordRollupSource(Base):
+    __tablename__ = "keyword_rollup_sources"
+
+    conversation_id = Column(String(100), primary_key=True)
+    project_id = Column(Integer, primary_key=True)
+    builder_name = Column(String, primary_key=True)
+    agent_id = Column(String(100), nullable=False, default="")
+    day = Column(Date, nullable=False)
+    contribution = Column(JSONB, nullable=False)  # [[category, keyword, speaker_role, hits], ...]
+    updated_on = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 #table to store A API key and values 
 class APIKey(Base):
     __tablename__ = "api_keys"
@@ -83,6 +125,11 @@ class APIKey(Base):
     is_active = Column(Boolean, default=True)
     created_at = Column(TIMESTAMP(timezone=True), default=datetime.utcnow)
     last_used = Column(TIMESTAMP(timezone=True))
+
+    # Per-key admission control, NULL means "use the defaults from settings"
+    rate_limit_per_minute = Column(Integer)
+    rate_limit_burst = Column(Integer)
+    max_concurrent_requests = Column(Integer)
     
     def __repr__(self):
         return f"<APIKey {self.key_id} - {self.owner_name}>"
\ No newline at end of file
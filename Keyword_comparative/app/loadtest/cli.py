@@ -0,0 +1,171 @@
+"""
+Load-test harness: seed a local database, replay recorded (or synthetic)
+traffic against the app and compare the result with a stored baseline.
+
+    python -m app.loadtest.cli seed --database-url sqlite:///loadtest.db --reset
+    python -m app.loadtest.cli synthesize --output traffic.jsonl --requests 5000
+    python -m app.loadtest.cli run --database-url sqlite:///loadtest.db --recording traffic.jsonl \\
+        --concurrency 20 --baseline loadtest-baseline.json
+
+Recordings come from a server started with LOADTEST_RECORD_PATH set.
+
+Write endpoints (keyword replace, key management) are left out of synthetic
+traffic and dropped from recordings by default: they change the seeded data,
+so two runs would no longer measure the same database. With --include-writes
+reseed (``seed --reset``) before every run to keep runs comparable. The
+in-process app also runs with ANALYTICS_ROLLUPS_ENABLED=False unless it is set
+explicitly; the only write left is api_keys.last_used, at most once per
+API_KEY_CACHE_TTL_SECONDS, which every run pays alike.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from urllib.parse import urlparse
+
+LOCAL_HOSTS = {"", "localhost", "127.0.0.1", "::1"}
+
+
+def _engine(database_url: str):
+    from sqlalchemy import create_engine
+    return create_engine(database_url)
+
+
+def _is_local(database_url: str) -> bool:
+    parsed = urlparse(database_url)
+    return parsed.scheme.startswith("sqlite") or (parsed.hostname or "") in LOCAL_HOSTS
+
+
+def seed(args) -> int:
+    from sqlalchemy.orm import Session
+    from app.database.models import Base, Project
+    from app.loadtest.fixtures import create_schema, generate_fixtures
+
+    if not _is_local(args.database_url):
+        print("Refusing to seed a non-local database", file=sys.stderr)
+        return 2
+    engine = _engine(args.database_url)
+    if args.reset:
+        Base.metadata.drop_all(engine)
+    create_schema(engine)
+    with Session(engine) as session:
+        if session.query(Project.id).first() is not None:
+            print("Database already has projects, pass --reset to replace them", file=sys.stderr)
+            return 2
+        counts = generate_fixtures(session, projects=args.projects,
+                                   conversations_per_project=args.conversations_per_project,
+                                   segments_per_conversation=(args.min_segments, args.max_segments),
+                                   seed=args.seed)
+    print(json.dumps(counts))
+    return 0
+
+
+def synthesize(args) -> int:
+    from app.loadtest.replay import synthetic_traffic
+
+    with open(args.output, "w", encoding="utf-8") as output:
+        for entry in synthetic_traffic(args.requests, rate_per_second=args.rate, seed=args.seed,
+                                       include_writes=args.include_writes):
+            output.write(json.dumps(entry, separators=(",", ":")) + "\n")
+    return 0
+
+
+def run(args) -> int:
+    from sqlalchemy.orm import Session
+    from app.loadtest.fixtures import FixtureCatalog, register_sqlite_jsonb
+    from app.loadtest.replay import load_recording, make_client, replay, without_writes
+    from app.loadtest import report as reporting
+
+    engine = _engine(args.database_url)
+    if engine.dialect.name == "sqlite":
+        register_sqlite_jsonb()
+    with Session(engine) as session:
+        catalog = FixtureCatalog.from_db(session)
+    entries = load_recording(args.recording)
+    if not args.include_writes:
+        recorded = len(entries)
+        entries = without_writes(entries)
+        if len(entries) < recorded:
+            print(f"Skipping {recorded - len(entries)} write requests (pass --include-writes to replay them)",
+                  file=sys.stderr)
+    if args.limit:
+        entries = entries[:args.limit]
+
+    async def replay_all():
+        async with make_client(args.base_url) as client:
+            return await replay(entries, catalog, client, concurrency=args.concurrency, speed=args.speed)
+
+    results, wall_seconds = asyncio.run(replay_all())
+    summary = reporting.summarize(results, wall_seconds, args.concurrency, args.speed)
+
+    regressions = []
+    if args.baseline and os.path.exists(args.baseline) and not args.update_baseline:
+        regressions = reporting.compare_to_baseline(
+            summary, reporting.load_baseline(args.baseline),
+            latency_tolerance=args.latency_tolerance,
+            throughput_tolerance=args.throughput_tolerance,
+            error_rate_tolerance=args.error_rate_tolerance)
+    print(reporting.format_report(summary, regressions))
+    if args.report:
+        reporting.save_baseline(summary, args.report)
+    if args.baseline and (args.update_baseline or not os.path.exists(args.baseline)):
+        reporting.save_baseline(summary, args.baseline)
+        print(f"Baseline written to {args.baseline}")
+    return 1 if regressions else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.loadtest.cli", description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_cmd = commands.add_parser("seed", help="create the schema and fixture data in a local database")
+    seed_cmd.add_argument("--database-url", required=True)
+    seed_cmd.add_argument("--reset", action="store_true", help="drop all tables first")
+    seed_cmd.add_argument("--projects", type=int, default=10)
+    seed_cmd.add_argument("--conversations-per-project", type=int, default=50)
+    seed_cmd.add_argument("--min-segments", type=int, default=20)
+    seed_cmd.add_argument("--max-segments", type=int, default=400)
+    seed_cmd.add_argument("--seed", type=int, default=0)
+    seed_cmd.set_defaults(handler=seed)
+
+    synth_cmd = commands.add_parser("synthesize", help="write a synthetic recording with the peak endpoint mix")
+    synth_cmd.add_argument("--output", required=True)
+    synth_cmd.add_argument("--requests", type=int, default=5000)
+    synth_cmd.add_argument("--rate", type=float, default=50.0, help="mean arrivals per second")
+    synth_cmd.add_argument("--seed", type=int, default=0)
+    synth_cmd.add_argument("--include-writes", action="store_true",
+                           help="also generate keyword replace calls (reseed before every run)")
+    synth_cmd.set_defaults(handler=synthesize)
+
+    run_cmd = commands.add_parser("run", help="replay a recording and report per-endpoint results")
+    run_cmd.add_argument("--database-url", required=True, help="seeded database (also used by the in-process app)")
+    run_cmd.add_argument("--recording", required=True)
+    run_cmd.add_argument("--base-url", help="replay against a running server instead of an in-process app")
+    run_cmd.add_argument("--concurrency", type=int, default=10)
+    run_cmd.add_argument("--speed", type=float, default=0.0,
+                         help="0 = as fast as possible, otherwise keep recorded arrival times sped up by this factor")
+    run_cmd.add_argument("--limit", type=int, help="replay only the first N requests")
+    run_cmd.add_argument("--include-writes", action="store_true",
+                         help="replay write requests too (they change the seeded data, reseed before every run)")
+    run_cmd.add_argument("--baseline", help="baseline JSON: compared against, written when missing")
+    run_cmd.add_argument("--update-baseline", action="store_true")
+    run_cmd.add_argument("--report", help="also write this run's summary as JSON")
+    run_cmd.add_argument("--latency-tolerance", type=float, default=0.25)
+    run_cmd.add_argument("--throughput-tolerance", type=float, default=0.25)
+    run_cmd.add_argument("--error-rate-tolerance", type=float, default=0.01)
+    run_cmd.set_defaults(handler=run)
+
+    args = parser.parse_args(argv)
+    # The in-process app reads its database from settings at import time
+    if getattr(args, "database_url", None):
+        os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("STARTUP_INDEX_CHECK", "False")
+    # Rollups are written on the first match of each conversation only, which would make
+    # the first run slower than the ones after it; keep the replayed app read-only
+    os.environ.setdefault("ANALYTICS_ROLLUPS_ENABLED", "False")
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+import hashlib
+import random
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.database.models import Base, Project, Conversation, Transcription, Keyword, APIKey
+from app.matching.engine import AGENT_SPEAKER, CUSTOMER_SPEAKER
+from app.matching.compiler import compile_keywords
+
+
+_sqlite_jsonb_registered = False
+
+LOADTEST_KEY_ID = "loadtest-replay"
+LOADTEST_API_KEY = "loadtest-replay-key"
+SPARE_KEY_PREFIX = "loadtest-spare-"
+
+# Generous limits: the replay measures the service, not the rate limiter
+LOADTEST_RATE_LIMIT_PER_MINUTE = 1_000_000
+LOADTEST_MAX_CONCURRENT_REQUESTS = 1_000
+
+CATEGORIES = {
+    "Finance": ["EMI", "down payment", "home loan", "interest rate", "processing fee", "bank approval"],
+    "Amenities": ["swimming pool", "club house", "gym", "children play area", "power backup", "covered parking"],
+    "Location": ["metro station", "airport", "highway", "school nearby", "IT park", "hospital"],
+    "Pricing": ["price per square feet", "total cost", "discount", "offer", "registration charges", "GST"],
+    "Site Visit": ["site visit", "sample flat", "weekend", "pick up", "model apartment", "visit schedule"],
+    "Possession": ["possession date", "ready to move", "under construction", "RERA", "handover", "OC certificate"],
+}
+
+FILLER = [
+    "okay", "sure", "yes", "I see", "let me check", "can you tell me", "we are looking for",
+    "the project", "two BHK", "three BHK", "my family", "this month", "please share the details",
+    "thank you", "is it possible", "what about", "I will call you back", "sounds good",
+]
+
+
+def generate_segments(rng: random.Random, count: int, keywords: List[str]) -> List[Dict[str, Any]]:
+    """Alternating agent/customer turns with timestamps; roughly a third mention a keyword."""
+    segments = []
+    clock = 0.0
+    for index in range(count):
+        words = rng.sample(FILLER, k=rng.randint(2, 5))
+        if keywords and rng.random() < 0.35:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(keywords))
+        duration = round(rng.uniform(1.5, 12.0), 2)
+        segments.append({
+            "speaker": AGENT_SPEAKER if index % 2 == 0 else CUSTOMER_SPEAKER,
+            "text": " ".join(words),
+            "start": round(clock, 2),
+            "end": round(clock + duration, 2),
+        })
+        clock += duration + rng.uniform(0.0, 1.0)
+    return segments
+
+
+def register_sqlite_jsonb() -> None:
+    """
+    Compile the schema's JSONB columns as JSON on SQLite, the closest type it has
+    (the matching code already falls back to json_each there). The hook is
+    process-wide, so only the seeding/replay entry points and tests call this.
+    """
+    global _sqlite_jsonb_registered
+    if _sqlite_jsonb_registered:
+        return
+    from sqlalchemy.dialects.postgresql import JSONB
+    from sqlalchemy.ext.compiler import compiles
+
+    @compiles(JSONB, "sqlite")
+    def _jsonb_on_sqlite(element, compiler, **kw):
+        return "JSON"
+
+    _sqlite_jsonb_registered = True
+
+
+def create_schema(engine):
+    """Create all tables on an empty local database (Postgres or SQLite)."""
+    if engine.dialect.name == "sqlite":
+        register_sqlite_jsonb()
+    Base.metadata.create_all(engine)
+
+
+def generate_fixtures(session: Session, projects: int = 10, conversations_per_project: int = 50,
+                      segments_per_conversation: Tuple[int, int] = (20, 400), spare_keys: int = 5,
+                      seed: int = 0) -> Dict[str, int]:
+    """
+    Seed a local database with deterministic synthetic projects, conversations,
+    diarized transcriptions, compiled keyword sets and the API keys the replay
+    uses. Transcript lengths are skewed like production: most calls are short,
+    a few are very long.
+    """
+    rng = random.Random(seed)
+    low, high = segments_per_conversation
+    now = datetime.utcnow()
+    counts = {"projects": 0, "conversations": 0, "segments": 0}
+
+    for project_index in range(1, projects + 1):
+        builder_name = f"Builder {project_index:03d}"
+        session.add(Project(id=project_index, name=f"Load test project {project_index:03d}",
+                            builder_name=builder_name, location="Load test", created_at=now, updated_at=now))
+
+        categories = rng.sample(sorted(CATEGORIES), k=rng.randint(3, len(CATEGORIES)))
+        items = [(category, keyword) for category in categories for keyword in CATEGORIES[category]]
+        compiled, _ = compile_keywords(items)
+        session.add(Keyword(project_id=project_index, builder_name=builder_name,
+                            keywords=compiled.categorized, compiled=compiled.to_artifact(),
+                            created_on=now, created_by="loadtest", updated_on=now, updated_by="loadtest"))
+
+        keywords = [keyword for _, keyword in items]
+        agents = [f"agent-{project_index:03d}-{n}" for n in range(1, 4)]
+        for conversation_index in range(conversations_per_project):
+            conversation_id = f"lt-{project_index:03d}-{conversation_index:05d}"
+            count = min(high, max(low, int(rng.lognormvariate(4.0, 0.8))))
+            segments = generate_segments(rng, count, keywords)
+            session.add(Conversation(conversation_id=conversation_id, agent_id=rng.choice(agents),
+                                     project_id=project_index))
+            session.add(Transcription(transcription_id=f"{conversation_id}-t", conversation_id=conversation_id,
+                                      transcript_text=" ".join(s["text"] for s in segments),
+                                      diarized_segments=segments))
+            counts["conversations"] += 1
+            counts["segments"] += count
+        counts["projects"] += 1
+        session.flush()
+
+    session.add(APIKey(key_id=LOADTEST_KEY_ID, key=LOADTEST_API_KEY, owner_name="loadtest",
+                       owner_email="loadtest@example.com", description="Load-test replay key", is_active=True, created_at=now,
+                       rate_limit_per_minute=LOADTEST_RATE_LIMIT_PER_MINUTE,
+                       rate_limit_burst=LOADTEST_RATE_LIMIT_PER_MINUTE,
+                       max_concurrent_requests=LOADTEST_MAX_CONCURRENT_REQUESTS))
+    # Targets for replayed /keys/{key_id}/activate|deactivate calls, so the replay never disables its own key
+    for n in range(spare_keys):
+        session.add(APIKey(key_id=f"{SPARE_KEY_PREFIX}{n}", key=f"{SPARE_KEY_PREFIX}{n}-key",
+                           owner_name="loadtest", owner_email="loadtest@example.com",
+                           is_active=True, created_at=now))
+    session.commit()
+    return counts
+
+
+def _bucket(token: str, size: int) -> int:
+    return int(hashlib.sha256(str(token).encode("utf-8")).hexdigest()[:8], 16) % size
+
+
+class FixtureCatalog:
+    """
+    Maps the anonymized tokens of a recording onto seeded fixture rows. The
+    mapping is deterministic (token hash modulo the fixture count), so a
+    conversation that recurs in the recording recurs in the replay, and a
+    conversation always comes with its own project and builder.
+    """
+
+    def __init__(self, projects: List[Tuple[int, str]], conversations: List[Tuple[str, int, str]],
+                 categories: Dict[int, List[str]], key_ids: List[str]):
+        self.projects = projects                # [(project_id, builder_name)]
+        self.conversations = conversations      # [(conversation_id, project_id, agent_id)]
+        self.categories = categories            # project_id -> [category]
+        self.key_ids = key_ids
+        self._builders = dict(projects)
+        self._vocabulary = [keyword for words in CATEGORIES.values() for keyword in words]
+
+    @classmethod
+    def from_db(cls, session: Session) -> "FixtureCatalog":
+        projects = [(p.id, p.builder_name) for p in session.query(Project.id, Project.builder_name)
+                    .order_by(Project.id)]
+        conversations = [(c.conversation_id, c.project_id, c.agent_id or "")
+                         for c in session.query(Conversation.conversation_id, Conversation.project_id,
+                                                Conversation.agent_id).order_by(Conversation.conversation_id)]
+        categories = {k.project_id: sorted(k.keywords or {}) for k in session.query(Keyword.project_id, Keyword.keywords)}
+        key_ids = [k.key_id for k in session.query(APIKey.key_id)
+                   .filter(APIKey.key_id.like(f"{SPARE_KEY_PREFIX}%")).order_by(APIKey.key_id)]
+        if not projects or not conversations:
+            raise ValueError("The database has no fixtures, seed it first")
+        return cls(projects, conversations, categories, key_ids)
+
+    def conversation(self, token: str) -> Tuple[str, int, str]:
+        return self.conversations[_bucket(token, len(self.conversations))]
+
+    def project(self, token: str) -> Tuple[int, str]:
+        return self.projects[_bucket(token, len(self.projects))]
+
+    def rewrite(self, entry: Dict[str, Any]) -> Tuple[str, Dict[str, Any], Optional[Any]]:
+        """
+        Concrete (path, query params, JSON body) for a recorded entry. Requests
+        that were 404s in production keep their unresolvable tokens so they are
+        404s in the replay as well.
+        """
+        params = dict(entry.get("params") or {})
+        body = entry.get("body")
+        path = entry["endpoint"]
+        for name, token in (entry.get("path_params") or {}).items():
+            value = self.key_ids[_bucket(token, len(self.key_ids))] if name == "key_id" and self.key_ids else token
+            path = path.replace("{" + name + "}", str(value))
+        if entry.get("status") == 404:
+            return path, params, body
+
+        project_id, builder_name, agent_id = None, None, None
+        if "conversation_id" in params:
+            conversation_id, project_id, agent_id = self.conversation(params["conversation_id"])
+            params["conversation_id"] = conversation_id
+        elif "project_id" in params:
+            project_id, _ = self.project(params["project_id"])
+        if project_id is not None:
+            builder_name = self._builders[project_id]
+            if "project_id" in params:
+                params["project_id"] = project_id
+            if "builder_name" in params:
+                params["builder_name"] = builder_name
+            if "agent_id" in params:
+                params["agent_id"] = agent_id or self.conversation(params["agent_id"])[2]
+            if "category" in params and self.categories.get(project_id):
+                categories = self.categories[project_id]
+                params["category"] = categories[_bucket(params["category"], len(categories))]
+
+        if isinstance(body, dict):
+            body = self._rewrite_body(body)
+        return path, params, body
+
+    def _rewrite_body(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        body = dict(body)
+        conversation_project = None
+        if "conversation_id" in body:
+            body["conversation_id"], conversation_project, _ = self.conversation(body["conversation_id"])
+        if isinstance(body.get("keyword_sets"), list):
+            refs = []
+            for index, ref in enumerate(body["keyword_sets"]):
+                # the first set belongs to the conversation's own project, like most real calls
+                if index == 0 and conversation_project is not None:
+                    project_id = conversation_project
+                else:
+                    project_id, _ = self.project(ref.get("project_id"))
+                refs.append({"project_id": project_id, "builder_name": self._builders[project_id]})
+            body["keyword_sets"] = refs
+        if isinstance(body.get("keywords"), list):
+            categories = sorted(CATEGORIES)
+            body["keywords"] = [
+                {"category": categories[_bucket(item.get("category"), len(categories))],
+                 "keyword": self._vocabulary[_bucket(item.get("keyword"), len(self._vocabulary))]}
+                for item in body["keywords"] if isinstance(item, dict)]
+        return body
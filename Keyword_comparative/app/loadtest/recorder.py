@@ -0,0 +1,161 @@
+import atexit
+import hashlib
+import json
+import logging
+import queue
+import random
+import secrets
+import threading
+import time
+from typing import Optional
+from urllib.parse import parse_qsl
+
+from app.authentication.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Values copied verbatim into the recording: they shape the work a request does
+# but identify nobody. Every other string (and every id) is replaced by a token.
+PASSTHROUGH_FIELDS = {"match_mode", "slop", "max_examples", "include_transcript", "date_from", "date_to"}
+
+# Request bodies larger than this are recorded by size only
+MAX_RECORDED_BODY_BYTES = 256 * 1024
+
+_STOP = object()
+
+
+def anonymize_value(field: Optional[str], value, salt: str):
+    """
+    Replace identifying data with stable salted tokens: the same input always
+    gives the same token (so replay can keep a conversation tied to its
+    project), but the original cannot be read back.
+    """
+    if isinstance(value, dict):
+        return {k: anonymize_value(k, v, salt) for k, v in value.items()}
+    if isinstance(value, list):
+        return [anonymize_value(field, v, salt) for v in value]
+    if field in PASSTHROUGH_FIELDS or value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)) and not (field or "").endswith("_id"):
+        return value
+    digest = hashlib.sha256(f"{salt}|{field}|{value}".encode("utf-8")).hexdigest()[:12]
+    return f"~{digest}"
+
+
+class TrafficRecorder:
+    """
+    Appends one JSON line per recorded request to ``path``. Entries are queued
+    by the request and written by a background thread, like the log listener.
+    """
+
+    def __init__(self, path: str, salt: str = "", sample_rate: float = 1.0):
+        self.path = path
+        self.salt = salt or secrets.token_hex(16)
+        self.sample_rate = sample_rate
+        self.started = time.monotonic()
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._write_loop, name="traffic-recorder", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def sampled(self) -> bool:
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def record(self, method: str, endpoint: str, path_params: dict, query_string: bytes, body: bytes, body_size: int,
+               has_api_key: bool, has_if_none_match: bool, status: int, latency_ms: float, started: float):
+        entry = {
+            "t": round(started - self.started, 4),
+            "method": method,
+            "endpoint": endpoint,
+            "path_params": anonymize_value(None, path_params, self.salt),
+            "params": anonymize_value(None, dict(parse_qsl(query_string.decode("latin-1"))), self.salt),
+            "api_key": has_api_key,
+            "if_none_match": has_if_none_match,
+            "status": status,
+            "latency_ms": round(latency_ms, 2),
+        }
+        if body_size > len(body):
+            entry["body_bytes"] = body_size
+        elif body:
+            try:
+                entry["body"] = anonymize_value(None, json.loads(body), self.salt)
+            except ValueError:
+                entry["body_bytes"] = body_size
+        self._queue.put(entry)
+
+    def _write_loop(self):
+        with open(self.path, "a", encoding="utf-8") as out:
+            while True:
+                entry = self._queue.get()
+                if entry is _STOP:
+                    return
+                out.write(json.dumps(entry, separators=(",", ":")) + "\n")
+                if self._queue.empty():
+                    out.flush()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout=5)
+
+
+class TrafficRecorderMiddleware:
+    """
+    ASGI middleware that records anonymized request logs for load-test replay
+    (enabled with LOADTEST_RECORD_PATH). The API key itself is never written,
+    only whether the caller sent one.
+    """
+
+    def __init__(self, app, recorder: Optional[TrafficRecorder] = None):
+        self.app = app
+        self.recorder = recorder or TrafficRecorder(
+            settings.LOADTEST_RECORD_PATH,
+            salt=settings.LOADTEST_ANONYMIZE_SALT,
+            sample_rate=settings.LOADTEST_RECORD_SAMPLE_RATE)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.recorder.sampled():
+            await self.app(scope, receive, send)
+            return
+
+        started = time.monotonic()
+        body = bytearray()
+        body_size = 0
+        status = 500
+
+        async def receive_and_keep_body():
+            nonlocal body_size
+            message = await receive()
+            if message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                body_size += len(chunk)
+                if body_size <= MAX_RECORDED_BODY_BYTES:
+                    body.extend(chunk)
+            return message
+
+        async def send_and_keep_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive_and_keep_body, send_and_keep_status)
+        finally:
+            headers = {name for name, _ in scope.get("headers", ())}
+            route = scope.get("route")
+            try:
+                self.recorder.record(
+                    method=scope["method"],
+                    endpoint=getattr(route, "path", None) or scope["path"],
+                    path_params=scope.get("path_params") or {},
+                    query_string=scope.get("query_string", b""),
+                    body=bytes(body),
+                    body_size=body_size,
+                    has_api_key=b"x-api-key" in headers,
+                    has_if_none_match=b"if-none-match" in headers,
+                    status=status,
+                    latency_ms=(time.monotonic() - started) * 1000,
+                    started=started)
+            except Exception:
+                logger.warning("Could not record request for load testing", exc_info=True)
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.loadtest.fixtures import FixtureCatalog, LOADTEST_API_KEY
+
+# Peak-hour mix used when there is no production recording yet: (share, method, endpoint, params, body).
+# Read-only, so every run sees the same seeded data and runs stay comparable.
+DEFAULT_MIX = [
+    (0.50, "POST", "/fetch_keywords_match", ("conversation_id", "project_id", "builder_name"), None),
+    (0.20, "GET", "/keywords", ("project_id", "builder_name"), None),
+    (0.10, "POST", "/download_keywords_match_excel", ("conversation_id", "project_id", "builder_name"), None),
+    (0.05, "GET", "/get_builder_name", ("conversation_id", "project_id"), None),
+    (0.10, "GET", "/keys", (), None),
+    (0.05, "GET", "/List_keys", (), None),
+]
+# Added on request (--include-writes); they change the seeded data, so reseed before every such run
+WRITE_MIX = [
+    (0.05, "POST", "/keywords/replace", ("project_id", "builder_name"), "keywords"),
+]
+# Endpoints that mutate fixtures; dropped from recordings unless writes are included
+WRITE_ENDPOINTS = {
+    ("POST", "/keywords/replace"),
+    ("POST", "/keys"),
+    ("PUT", "/keys/{key_id}/activate"),
+    ("PUT", "/keys/{key_id}/deactivate"),
+}
+
+
+@dataclass
+class RequestResult:
+    endpoint: str
+    status: int  # 0 when the request failed before a response arrived
+    latency_ms: float
+    error: Optional[str] = None
+
+
+def load_recording(path: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Read a JSONL recording (see app/loadtest/recorder.py), oldest request first."""
+    entries = []
+    with open(path, encoding="utf-8") as recording:
+        for line in recording:
+            line = line.strip()
+            if line:
+                entries.append(json.loads(line))
+    entries.sort(key=lambda entry: entry.get("t", 0))
+    return entries[:limit] if limit else entries
+
+
+def without_writes(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Drop the entries of WRITE_ENDPOINTS, so a replay leaves the seeded data untouched."""
+    return [entry for entry in entries if (entry.get("method"), entry.get("endpoint")) not in WRITE_ENDPOINTS]
+
+
+def synthetic_traffic(count: int, rate_per_second: float = 50.0, mix=DEFAULT_MIX, seed: int = 0,
+                      distinct_conversations: int = 200, include_writes: bool = False) -> List[Dict[str, Any]]:
+    """
+    Entries in the recording format for a Poisson arrival process with the given
+    endpoint mix (plus WRITE_MIX with ``include_writes``). Conversations are
+    drawn from a bounded, skewed pool so repeats (and therefore cache hits)
+    happen at a realistic rate.
+    """
+    rng = random.Random(seed)
+    if include_writes:
+        mix = list(mix) + WRITE_MIX
+    shares = [share for share, *_ in mix]
+    clock = 0.0
+    entries = []
+    for _ in range(count):
+        clock += rng.expovariate(rate_per_second)
+        _, method, endpoint, fields, body_kind = rng.choices(mix, weights=shares)[0]
+        token = f"~{int(rng.paretovariate(1.2) * 7919) % distinct_conversations:012x}"
+        entry = {"t": round(clock, 4), "method": method, "endpoint": endpoint, "path_params": {},
+                 "params": {field: token for field in fields}, "api_key": True,
+                 "if_none_match": rng.random() < 0.2, "status": 200}
+        if body_kind == "keywords":
+            entry["body"] = {"keywords": [{"category": f"~{rng.getrandbits(48):012x}",
+                                           "keyword": f"~{rng.getrandbits(48):012x}"}
+                                          for _ in range(rng.randint(5, 40))]}
+        entries.append(entry)
+    return entries
+
+
+def make_client(base_url: Optional[str] = None, timeout: float = 60.0):
+    """
+    HTTP client for the replay: against a running server when ``base_url`` is
+    given, otherwise against an in-process app built by create_app().
+    """
+    import httpx
+
+    if base_url:
+        return httpx.AsyncClient(base_url=base_url, timeout=timeout)
+    from app.main import create_app
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app(), raise_app_exceptions=False),
+                             base_url="http://loadtest", timeout=timeout)
+
+
+async def replay(entries: List[Dict[str, Any]], catalog: FixtureCatalog, client, concurrency: int = 10,
+                 speed: float = 0.0, api_key: str = LOADTEST_API_KEY) -> Tuple[List[RequestResult], float]:
+    """
+    Replay recorded entries. With ``speed`` 0 requests are sent back to back by
+    ``concurrency`` workers (closed loop, measures capacity); otherwise they keep
+    the recorded arrival times compressed by ``speed`` (open loop, measures
+    latency under the recorded load), still capped at ``concurrency`` in flight.
+    Returns the per-request results and the wall-clock duration in seconds.
+    """
+    results: List[RequestResult] = []
+    etags: Dict[Tuple[str, str], str] = {}
+    gate = asyncio.Semaphore(concurrency)
+
+    async def send(entry):
+        path, params, body = catalog.rewrite(entry)
+        headers = {}
+        if entry.get("api_key", True):
+            headers["X-API-Key"] = api_key
+        cache_key = (path, json.dumps(params, sort_keys=True))
+        if entry.get("if_none_match") and cache_key in etags:
+            headers["If-None-Match"] = etags[cache_key]
+
+        name = f"{entry['method']} {entry['endpoint']}"
+        started = time.perf_counter()
+        try:
+            async with client.stream(entry["method"], path, params=params, json=body, headers=headers) as response:
+                await response.aread()
+            if "etag" in response.headers:
+                etags[cache_key] = response.headers["etag"]
+            results.append(RequestResult(name, response.status_code, (time.perf_counter() - started) * 1000))
+        except Exception as e:
+            results.append(RequestResult(name, 0, (time.perf_counter() - started) * 1000, type(e).__name__))
+
+    async def gated(entry):
+        async with gate:
+            await send(entry)
+
+    started = time.perf_counter()
+    if speed and speed > 0:
+        origin = entries[0].get("t", 0) if entries else 0
+        tasks = []
+        for entry in entries:
+            delay = (entry.get("t", 0) - origin) / speed - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(gated(entry)))
+        await asyncio.gather(*tasks)
+    else:
+        pending = iter(entries)
+
+        async def worker():
+            for entry in pending:
+                await send(entry)
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return results, time.perf_counter() - started
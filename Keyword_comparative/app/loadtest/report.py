@@ -0,0 +1,103 @@
+import json
+import math
+from collections import Counter, defaultdict
+from typing import Any, Dict, List
+
+from app.loadtest.replay import RequestResult
+
+PERCENTILES = (50, 90, 95, 99)
+OVERALL = "(all)"
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(sorted_values)) - 1
+    return sorted_values[max(0, min(len(sorted_values) - 1, rank))]
+
+
+def _stats(results: List[RequestResult], wall_seconds: float) -> Dict[str, Any]:
+    latencies = sorted(r.latency_ms for r in results)
+    errors = sum(1 for r in results if r.status == 0 or r.status >= 500)
+    rejected = sum(1 for r in results if r.status == 429)
+    stats = {
+        "requests": len(results),
+        "throughput_rps": round(len(results) / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+        "errors": errors,
+        "error_rate": round(errors / len(results), 4) if results else 0.0,
+        "rejected": rejected,
+        "rejected_rate": round(rejected / len(results), 4) if results else 0.0,
+        "status_counts": {str(status): n for status, n in sorted(Counter(r.status for r in results).items())},
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+    }
+    for pct in PERCENTILES:
+        stats[f"p{pct}_ms"] = round(percentile(latencies, pct), 2)
+    return stats
+
+
+def summarize(results: List[RequestResult], wall_seconds: float, concurrency: int, speed: float) -> Dict[str, Any]:
+    """Throughput, error rates and latency percentiles per endpoint and overall."""
+    by_endpoint = defaultdict(list)
+    for result in results:
+        by_endpoint[result.endpoint].append(result)
+    endpoints = {name: _stats(group, wall_seconds) for name, group in sorted(by_endpoint.items())}
+    endpoints[OVERALL] = _stats(results, wall_seconds)
+    return {
+        "wall_seconds": round(wall_seconds, 3),
+        "concurrency": concurrency,
+        "speed": speed,
+        "endpoints": endpoints,
+    }
+
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any], latency_tolerance: float = 0.25,
+                        throughput_tolerance: float = 0.25, error_rate_tolerance: float = 0.01,
+                        min_requests: int = 20) -> List[str]:
+    """
+    Regressions of ``report`` against a stored baseline run: p50/p95/p99 latency
+    or throughput worse than the relative tolerance, error or rejection rate up
+    by more than the absolute tolerance. Endpoints with fewer than
+    ``min_requests`` requests in either run are too noisy to judge.
+    """
+    regressions = []
+    for name, current in report["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(name)
+        if not previous or min(current["requests"], previous["requests"]) < min_requests:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            if previous[metric] > 0 and current[metric] > previous[metric] * (1 + latency_tolerance):
+                regressions.append(f"{name}: {metric} {previous[metric]} -> {current[metric]}")
+        if report.get("speed") == baseline.get("speed") == 0 and \
+                current["throughput_rps"] < previous["throughput_rps"] * (1 - throughput_tolerance):
+            regressions.append(f"{name}: throughput_rps {previous['throughput_rps']} -> {current['throughput_rps']}")
+        for metric in ("error_rate", "rejected_rate"):
+            if current[metric] > previous[metric] + error_rate_tolerance:
+                regressions.append(f"{name}: {metric} {previous[metric]} -> {current[metric]}")
+    return regressions
+
+
+def format_report(report: Dict[str, Any], regressions: List[str]) -> str:
+    header = f"{'endpoint':<45}{'reqs':>7}{'rps':>9}{'err%':>7}{'429%':>7}" + \
+             "".join(f"{f'p{pct}':>9}" for pct in PERCENTILES) + f"{'max':>9}"
+    lines = [f"{report['wall_seconds']}s wall, concurrency {report['concurrency']}, speed {report['speed'] or 'max'}",
+             header]
+    for name, stats in report["endpoints"].items():
+        lines.append(
+            f"{name:<45}{stats['requests']:>7}{stats['throughput_rps']:>9}"
+            f"{stats['error_rate'] * 100:>7.1f}{stats['rejected_rate'] * 100:>7.1f}"
+            + "".join(f"{stats[f'p{pct}_ms']:>9}" for pct in PERCENTILES) + f"{stats['max_ms']:>9}")
+    if regressions:
+        lines.append("REGRESSIONS against baseline:")
+        lines.extend(f"  {line}" for line in regressions)
+    return "\n".join(lines)
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as baseline:
+        return json.load(baseline)
+
+
+def save_baseline(report: Dict[str, Any], path: str):
+    with open(path, "w", encoding="utf-8") as baseline:
+        json.dump(report, baseline, indent=2)
@@ -0,0 +1,154 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import time
+import uuid
+from typing import Optional
+
+from app.authentication.config import settings
+
+# Per-request context, set by RequestContextMiddleware
+request_id_var = contextvars.ContextVar("request_id", default=None)
+log_sampled_var = contextvars.ContextVar("log_sampled", default=True)
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_output: Optional[logging.Handler] = None
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Stamps the request id on every record and drops sampled-out INFO/DEBUG
+    records. WARNING and above are always kept.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        if record.levelno >= logging.WARNING:
+            return True
+        return log_sampled_var.get()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; the message is only %-formatted here, in the listener thread."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for name, value in vars(record).items():
+            if name not in _RESERVED and not name.startswith("_"):
+                entry[name] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _EnqueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that ships the record untouched: the queue is in-process, so
+    message %-formatting and tracebacks are rendered by the listener instead
+    of the request thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging() -> None:
+    """
+    Route all logging through a non-blocking queue: request threads only enqueue
+    records, a background listener thread formats and writes them.
+    Safe to call more than once, and again after shutdown_logging().
+    """
+    global _listener, _output
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler()
+    if settings.LOG_FORMAT == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter(
+            "%(asctime)s - %(levelname)s - [%(request_id)s] %(message)s"))
+
+    enqueue = _EnqueueHandler(queue.SimpleQueue())
+    enqueue.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [enqueue]
+    root.setLevel(settings.LOG_LEVEL.upper())
+
+    if _output is None:
+        atexit.register(shutdown_logging)
+    _output = output
+    _listener = logging.handlers.QueueListener(enqueue.queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """
+    Flush queued records and stop the listener thread. The root logger then
+    writes directly to the output handler, so records logged after shutdown
+    (or before the next setup_logging()) are not left in a dead queue.
+    """
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    _listener = None
+    _output.addFilter(RequestContextFilter())
+    logging.getLogger().handlers[:] = [_output]
+
+
+class RequestContextMiddleware:
+    """
+    ASGI middleware: assigns each request an id (reusing X-Request-ID when the
+    caller sends one), decides once whether its INFO logs are sampled and
+    echoes the id back in the response headers.
+    """
+
+    def __init__(self, app, sample_rate: Optional[float] = None):
+        self.app = app
+        self.sample_rate = settings.LOG_INFO_SAMPLE_RATE if sample_rate is None else sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", ()):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:128]
+                break
+        request_id = request_id or uuid.uuid4().hex
+
+        id_token = request_id_var.set(request_id)
+        sampled_token = log_sampled_var.set(self.sample_rate >= 1 or random.random() < self.sample_rate)
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                headers.append((REQUEST_ID_HEADER.lower().encode("latin-1"), request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(id_token)
+            log_sampled_var.reset(sampled_token)
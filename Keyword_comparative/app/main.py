@@ -1,34 +1,42 @@
-from fastapi.responses import JSONResponse,StreamingResponse
-from fastapi import FastAPI, HTTPException, Query,Depends,APIRouter,Body
+from fastapi.responses import JSONResponse,StreamingResponse,Response
+from fastapi import FastAPI, HTTPException, Query,Depends,APIRouter,Body,Header
 from pydantic import BaseModel
-from typing import List, Dict
+from typing import List, Dict, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import and_, func
 from app.database.models import Transcription, Keyword, Conversation, Project,APIKey
-from app.database.database import TranscriptionSessionLocal,get_db
+from app.database.database import get_db,get_read_db,transcription_engine
+from app.database.indexes import check_indexes
 import logging
-from rapidfuzz import fuzz
-import re
 import io
-import pandas as pd
-from typing import List
-import uuid
 import json
-from app.authentication.authen import generate_api_key, get_api_key, get_api_owner
+from app.authentication.authen import get_api_key, get_api_owner
+from app.authentication.rate_limit import (rate_limited_key, INTERACTIVE, MATCHING, BULK,
+                                           AdmissionRejected, admission_rejected_handler)
 from app.authentication.config import settings
-from datetime import datetime
-from collections import defaultdict
+from app.authentication.api_key import app as api_key_router, APIKeyInfo
+from app.logging_config import setup_logging, shutdown_logging, RequestContextMiddleware
+from app.cache.response_cache import get_response_cache, make_etag, etag_matches, serialize_body
+from app.matching.engine import (AGENT_SPEAKER, CUSTOMER_SPEAKER, FUZZY, PHRASE, MATCH_MODES,
+                                 match_keywords_with_summary, match_keyword_sets, prepare_segments,
+                                 score_keywords, SemanticUnavailable)
+from app.matching.compiler import compile_keywords, load_keyword_set, KeywordCompileError
+from app.matching.streaming import CHUNKED_MODES, ChunkedMatchAccumulator, iter_segment_chunks, iter_json_response
+from app.analytics.rollups import safe_record_match_rollups, query_keyword_analytics
+from datetime import datetime, date
+from contextlib import asynccontextmanager
+
+# pandas / xlsxwriter are imported inside the Excel export only, they dominate import time
+
+# Setup logger (handlers are installed by setup_logging() in create_app)
+logger = logging.getLogger(__name__)
 
-app = FastAPI(
-    title="Comparative Transcription Service",
-    description="Compare diarization text with categorized keywords from DB",
-    version="1.0.0"
-)
+router = APIRouter()
 
-# Setup logger
-logging.basicConfig(level=logging.INFO,format='%(asctime)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
+def report_missing_indexes():
+    """Warn at boot if the hot-path indexes from the Alembic migrations are missing."""
+    if settings.STARTUP_INDEX_CHECK:
+        check_indexes(transcription_engine)
 
 # Input model for replacing keywords
 class KeywordBatch(BaseModel):
@@ -36,56 +44,27 @@ class KeywordBatch(BaseModel):
     builder_name: str
     keywords: List[Dict[str, str]]  # Each item: {category: ..., keyword: ...}
 
-# Pydantic models for API responses
-class APIKeyCreate(BaseModel):
-    owner_name: str
-    owner_email: str
-    description: str = None
-
-class APIKeyInfo(BaseModel):
-    key_id: str
-    owner_name: str
-    owner_email: str
-    description: str = None
-    is_active: bool
-    created_at: datetime
-    last_used: datetime = None
-
-class APIKeyResponse(BaseModel):
-    key_id: str
-    api_key: str
-    owner_name: str
-
-import re
-from fastapi import FastAPI, Query, Depends, HTTPException
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
-from fuzzywuzzy import fuzz
-import logging
-
-app = FastAPI()
-logger = logging.getLogger(__name__)
-
-def clean_text(text: str) -> str:
-    return re.sub(r'[^a-zA-Z0-9 ]', '', text.casefold()).strip()
-
-
-def get_fuzzy_score(keyword, text):
-    partial = fuzz.partial_ratio(keyword, text)
-    token = fuzz.token_set_ratio(keyword, text)
-    return (partial + token) // 2  # average score
-
-@app.post("/fetch_keywords_match", summary="Fuzzy match keywords with intelligent speaker tagging")
+@router.post("/fetch_keywords_match", summary="Fuzzy match keywords with intelligent speaker tagging")
 def fetch_keywords_match(
     conversation_id: str = Query(...),
     project_id: int = Query(...),
     builder_name: str = Query(...),
-    session: Session = Depends(get_db),
-    key: str = Depends(get_api_key)
+    match_mode: str = Query(FUZZY, description="'fuzzy' (whole segment), 'phrase' (word boundaries, per-token fuzziness) or 'semantic' (phrase + embedding similarity)"),
+    slop: int = Query(0, ge=0, le=10, description="Phrase mode: extra words allowed between keyword words"),
+    if_none_match: Optional[str] = Header(None),
+    session: Session = Depends(get_read_db),
+    write_session: Session = Depends(get_db),
+    key: str = Depends(rate_limited_key(MATCHING))
 ):
     try:
-        logger.info(f"Matching for convo={conversation_id}, project={project_id}, builder={builder_name}")
-        owner = get_api_owner(key, session)
+        logger.info("Matching for convo=%s, project=%s, builder=%s", conversation_id, project_id, builder_name)
+
+        if match_mode not in MATCH_MODES:
+            return JSONResponse(
+                content={"Error code": "ERR-1009",
+                         "Error message": f"match_mode must be one of {', '.join(MATCH_MODES)}",
+                         "Conversation Id": f"{conversation_id}"},
+                status_code=400)
 
         # Validate conversation
         conversation = session.query(Conversation).filter_by(conversation_id=conversation_id).first()
@@ -114,9 +93,12 @@ def fetch_keywords_match(
                          "Builder Name": f"{builder_name}"},
                 status_code=404)
 
-        # Get transcription
-        transcription = session.query(Transcription).filter_by(conversation_id=conversation_id).first()
-        if not transcription or not transcription.transcript_text:
+        # Get transcription identity only, the segments are loaded if the response is not cached
+        transcription_ref = session.query(
+            Transcription.transcription_id,
+            (func.length(Transcription.transcript_text) > 0).label("has_text")
+        ).filter_by(conversation_id=conversation_id).first()
+        if not transcription_ref or not transcription_ref.has_text:
             return JSONResponse(
                 content={"Error code": "ERR-1004",
                          "Error message": "Transcription Not found for this conversation",
@@ -124,18 +106,40 @@ def fetch_keywords_match(
                          "Project id": f"{project_id}",
                          "Builder Name": f"{builder_name}"},
                 status_code=404)
-        diarized_segments = transcription.diarized_segments or []
 
         # Manually assign roles
-        agent_speaker = "Speaker_1"
-        customer_speaker = "Speaker_0"
+        agent_speaker = AGENT_SPEAKER
+        customer_speaker = CUSTOMER_SPEAKER
 
-        # Fetch keywords
-        keyword_obj = session.query(Keyword).filter_by(
+        # Fetch keyword set version (id + updated_on) without the JSONB blob
+        keyword_ref = session.query(Keyword.id, Keyword.updated_on).filter_by(
             project_id=project_id,
             builder_name=builder_name.strip()
         ).first()
+        if not keyword_ref:
+            return JSONResponse(
+                content={"Error code": "ERR-1005",
+                         "Error message": "Keyword not found for the given project and builder",
+                         "Project id": f"{project_id}",
+                         "Builder Name": f"{builder_name}"},
+                status_code=404)
+
+        # Same transcription + same keyword set version => byte-identical response
+        etag = make_etag("fetch_keywords_match", transcription_ref.transcription_id,
+                         conversation.agent_id, project.id, project.builder_name,
+                         keyword_ref.id, keyword_ref.updated_on, match_mode, slop)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        cache = get_response_cache()
+        cached_body = cache.get(etag)
+        if cached_body is not None:
+            return Response(content=cached_body, media_type="application/json", headers={"ETag": etag})
+
+        transcription = session.query(Transcription).filter_by(
+            transcription_id=transcription_ref.transcription_id).first()
+        diarized_segments = transcription.diarized_segments or []
 
+        keyword_obj = session.query(Keyword).filter_by(id=keyword_ref.id).first()
         if not keyword_obj or not keyword_obj.keywords:
             return JSONResponse(
                 content={"Error code": "ERR-1005",
@@ -144,62 +148,327 @@ def fetch_keywords_match(
                          "Builder Name": f"{builder_name}"},
                 status_code=404)
 
-        categorized_keywords = keyword_obj.keywords
-        result = []
-
-        # Fuzzy Match Logic
-        for category, keyword_list in categorized_keywords.items():
-            keyword_matches = []
-
-            for keyword in keyword_list:
-                keyword_clean = clean_text(keyword)
-                agent_count = customer_count = 0
-                agent_texts, customer_texts = [], []
-
-                for segment in diarized_segments:
-                    speaker = segment.get("speaker", "")
-                    text = segment.get("text", "")
-                    text_clean = clean_text(text)
-
-                    score = get_fuzzy_score(keyword_clean, text_clean)
-                    if score >= 85:
-                        entry = {"text": text, "speaker": speaker}
-                        if speaker == agent_speaker:
-                            agent_count += 1
-                            agent_texts.append(entry)
-                        elif speaker == customer_speaker:
-                            customer_count += 1
-                            customer_texts.append(entry)
-
-                keyword_matches.append({
-                    "keyword": keyword,
-                    "countBySpeaker": {
-                        "Agent": {"count": agent_count, "text": agent_texts},
-                        "Customer": {"count": customer_count, "text": customer_texts}
-                    }
-                })
-
-            result.append({
-                "category": category,
-                "keywords": keyword_matches
-            })
+        # Fuzzy Match Logic (+ per-speaker / per-category totals from the same hits)
+        result, summary = match_keywords_with_summary(
+            load_keyword_set(keyword_obj), diarized_segments, agent_speaker, customer_speaker,
+            mode=match_mode, slop=slop, segment_cache_key=transcription.transcription_id)
 
-        return {
+        body = serialize_body({
             "status": "success",
             "agent_id": conversation.agent_id,
             "conversation_id": conversation.conversation_id,
             "project_id": project.id,
             "builder_name": project.builder_name,
             "matched_Keywords": result,
+            "summary": summary,
             "diarized_text": diarized_segments,
             "agent_speaker": agent_speaker,
             "customer_speaker": customer_speaker
-        }
+        })
+        # Rollups count the default (fuzzy) mode only, so alternating modes don't flip them
+        if settings.ANALYTICS_ROLLUPS_ENABLED and match_mode == FUZZY:
+            safe_record_match_rollups(write_session, conversation_id, conversation.agent_id,
+                                      project_id, builder_name.strip(), result, read_session=session)
+        cache.set(etag, body)
+        return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+    except SemanticUnavailable as e:
+        logger.warning("Semantic matching unavailable: %s", e)
+        return JSONResponse(
+            content={"Error code": "ERR-1010",
+                     "Error message": f"Semantic matching is not available on this server: {e}",
+                     "Conversation Id": f"{conversation_id}"},
+            status_code=503)
 
     except Exception as e:
         logger.exception("Error in fetch_keywords_match")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/fetch_keywords_match_stream", summary="Memory-bounded keyword matching for very long transcripts (chunked, streamed JSON)")
+def fetch_keywords_match_stream(
+    conversation_id: str = Query(...),
+    project_id: int = Query(...),
+    builder_name: str = Query(...),
+    match_mode: str = Query(FUZZY, description="'fuzzy' or 'phrase'"),
+    slop: int = Query(0, ge=0, le=10, description="Phrase mode: extra words allowed between keyword words"),
+    max_examples: int = Query(None, ge=0, le=settings.MAX_EXAMPLE_TEXTS_PER_KEYWORD,
+                              description="Texts kept per keyword and speaker (counts always include every hit)"),
+    include_transcript: bool = Query(True, description="Stream diarized_text back in the response"),
+    session: Session = Depends(get_read_db),
+    write_session: Session = Depends(get_db),
+    key: str = Depends(rate_limited_key(MATCHING))
+):
+    try:
+        logger.info("Chunked matching for convo=%s, project=%s, builder=%s", conversation_id, project_id, builder_name)
+
+        if match_mode not in CHUNKED_MODES:
+            return JSONResponse(
+                content={"Error code": "ERR-1009",
+                         "Error message": f"match_mode must be one of {', '.join(CHUNKED_MODES)} in chunked mode",
+                         "Conversation Id": f"{conversation_id}"},
+                status_code=400)
+
+        conversation = session.query(Conversation).filter_by(conversation_id=conversation_id).first()
+        if not conversation:
+            return JSONResponse(
+                content={"Error code": "ERR-1001",
+                         "Error message": "Conversation Id not Match",
+                         "Conversation Id": f"{conversation_id}"},
+                status_code=404)
+        if conversation.project_id != project_id:
+            return JSONResponse(
+                content={"Error code": "ERR-1002",
+                         "Error message": "The provided project ID doesn't correspond to this conversation.",
+                         "Conversation Id": f"{conversation_id}",
+                         "Project id": f"{project_id}"},
+                status_code=404)
+
+        project = session.query(Project).filter_by(id=project_id, builder_name=builder_name.strip()).first()
+        if not project:
+            return JSONResponse(
+                content={"Error code": "ERR-1003",
+                         "Error message": "The provided project does not have an associated builder name",
+                         "Conversation Id": f"{conversation_id}",
+                         "Project id": f"{project_id}",
+                         "Builder Name": f"{builder_name}"},
+                status_code=404)
+
+        # Only the identity here, the segments are streamed from the JSONB column below
+        transcription_ref = session.query(
+            Transcription.transcription_id,
+            (func.length(Transcription.transcript_text) > 0).label("has_text")
+        ).filter_by(conversation_id=conversation_id).first()
+        if not transcription_ref or not transcription_ref.has_text:
+            return JSONResponse(
+                content={"Error code": "ERR-1004",
+                         "Error message": "Transcription Not found for this conversation",
+                         "Conversation Id": f"{conversation_id}",
+                         "Project id": f"{project_id}",
+                         "Builder Name": f"{builder_name}"},
+                status_code=404)
+
+        keyword_obj = session.query(Keyword).filter_by(
+            project_id=project_id, builder_name=builder_name.strip()).first()
+        if not keyword_obj or not keyword_obj.keywords:
+            return JSONResponse(
+                content={"Error code": "ERR-1005",
+                         "Error message": "Keyword not found for the given project and builder",
+                         "Project id": f"{project_id}",
+                         "Builder Name": f"{builder_name}"},
+                status_code=404)
+
+        chunk_size = settings.SEGMENT_CHUNK_SIZE
+        transcription_id = transcription_ref.transcription_id
+        accumulator = ChunkedMatchAccumulator(
+            load_keyword_set(keyword_obj), mode=match_mode, slop=slop,
+            max_examples=settings.MAX_EXAMPLE_TEXTS_PER_KEYWORD if max_examples is None else max_examples)
+        for chunk in iter_segment_chunks(session, transcription_id, chunk_size):
+            accumulator.add_chunk(chunk)
+        result = accumulator.result()
+
+        head = {
+            "status": "success",
+            "agent_id": conversation.agent_id,
+            "conversation_id": conversation.conversation_id,
+            "project_id": project.id,
+            "builder_name": project.builder_name,
+            "segments_processed": accumulator.segments_seen,
+        }
+        if settings.ANALYTICS_ROLLUPS_ENABLED and match_mode == FUZZY:
+            safe_record_match_rollups(write_session, conversation_id, head["agent_id"],
+                                      project_id, builder_name.strip(), result, read_session=session)
+
+        segment_chunks = None
+        if include_transcript:
+            # The request session is closed once the endpoint returns, the transcript gets its own
+            bind = session.get_bind()
+
+            def transcript_chunks():
+                with Session(bind=bind) as stream_session:
+                    yield from iter_segment_chunks(stream_session, transcription_id, chunk_size)
+
+            segment_chunks = transcript_chunks()
+
+        return StreamingResponse(
+            iter_json_response(head, result, segment_chunks,
+                               {"agent_speaker": AGENT_SPEAKER, "customer_speaker": CUSTOMER_SPEAKER}),
+            media_type="application/json")
+
+    except Exception as e:
+        logger.exception("Error in fetch_keywords_match_stream")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Pydantic models for matching one conversation against several keyword sets
+class KeywordSetRef(BaseModel):
+    project_id: int
+    builder_name: str
+
+class MultiMatchRequest(BaseModel):
+    conversation_id: str
+    keyword_sets: List[KeywordSetRef]
+    match_mode: str = FUZZY
+    slop: int = 0
+
+
+@router.post("/fetch_keywords_match_multi", summary="Fuzzy match one conversation against several builders' keyword sets in one pass")
+def fetch_keywords_match_multi(
+    payload: MultiMatchRequest,
+    session: Session = Depends(get_read_db),
+    write_session: Session = Depends(get_db),
+    key: str = Depends(rate_limited_key(MATCHING))
+):
+    conversation_id = payload.conversation_id
+    try:
+        logger.info("Multi matching for convo=%s, sets=%d", conversation_id, len(payload.keyword_sets))
+
+        if payload.match_mode not in MATCH_MODES or not 0 <= payload.slop <= 10:
+            return JSONResponse(
+                content={"Error code": "ERR-1009",
+                         "Error message": f"match_mode must be one of {', '.join(MATCH_MODES)} and slop between 0 and 10",
+                         "Conversation Id": f"{conversation_id}"},
+                status_code=400)
+
+        if not payload.keyword_sets:
+            return JSONResponse(
+                content={"Error code": "ERR-1005",
+                         "Error message": "At least one keyword set (project_id, builder_name) is required",
+                         "Conversation Id": f"{conversation_id}"},
+                status_code=400)
+
+        conversation = session.query(Conversation).filter_by(conversation_id=conversation_id).first()
+        if not conversation:
+            return JSONResponse(
+                content={"Error code": "ERR-1001",
+                         "Error message": "Conversation Id not Match",
+                         "Conversation Id": f"{conversation_id}"},
+                status_code=404)
+
+        # Other builders' sets may be compared, but the conversation's own project must be one of them
+        if all(ref.project_id != conversation.project_id for ref in payload.keyword_sets):
+            return JSONResponse(
+                content={"Error code": "ERR-1002",
+                         "Error message": "The provided project ID doesn't correspond to this conversation.",
+                         "Conversation Id": f"{conversation_id}",
+                         "Project id": f"{conversation.project_id}"},
+                status_code=404)
+
+        # Validate every (project, builder) pair, like the single-set endpoints do
+        requested_ids = {ref.project_id for ref in payload.keyword_sets}
+        project_builders = {
+            (project.id, project.builder_name)
+            for project in session.query(Project.id, Project.builder_name).filter(Project.id.in_(requested_ids))
+        }
+        for ref in payload.keyword_sets:
+            if (ref.project_id, ref.builder_name.strip()) not in project_builders:
+                return JSONResponse(
+                    content={"Error code": "ERR-1003",
+                             "Error message": "The provided project does not have an associated builder name",
+                             "Conversation Id": f"{conversation_id}",
+                             "Project id": f"{ref.project_id}",
+                             "Builder Name": f"{ref.builder_name}"},
+                    status_code=404)
+
+        transcription = session.query(Transcription).filter_by(conversation_id=conversation_id).first()
+        if not transcription or not transcription.transcript_text:
+            return JSONResponse(
+                content={"Error code": "ERR-1004",
+                         "Error message": "Transcription Not found for this conversation",
+                         "Conversation Id": f"{conversation_id}"},
+                status_code=404)
+        diarized_segments = transcription.diarized_segments or []
+
+        # Fetch every requested keyword set, duplicates in the request are collapsed
+        keyword_sets = {}
+        for ref in payload.keyword_sets:
+            set_key = (ref.project_id, ref.builder_name.strip())
+            if set_key in keyword_sets:
+                continue
+            keyword_obj = session.query(Keyword).filter_by(
+                project_id=ref.project_id, builder_name=set_key[1]).first()
+            if not keyword_obj or not keyword_obj.keywords:
+                return JSONResponse(
+                    content={"Error code": "ERR-1005",
+                             "Error message": "Keyword not found for the given project and builder",
+                             "Conversation Id": f"{conversation_id}",
+                             "Project id": f"{ref.project_id}",
+                             "Builder Name": f"{ref.builder_name}"},
+                    status_code=404)
+            keyword_sets[set_key] = load_keyword_set(keyword_obj)
+
+        # One scoring pass over the union of all keyword sets
+        results, unique_keywords = match_keyword_sets(
+            keyword_sets, diarized_segments, mode=payload.match_mode, slop=payload.slop,
+            segment_cache_key=transcription.transcription_id)
+
+        response = {
+            "status": "success",
+            "agent_id": conversation.agent_id,
+            "conversation_id": conversation.conversation_id,
+            "unique_keywords_scored": unique_keywords,
+            "keyword_sets": [
+                {"project_id": project_id, "builder_name": builder_name, "matched_Keywords": matched}
+                for (project_id, builder_name), matched in results.items()
+            ],
+            "diarized_text": diarized_segments,
+            "agent_speaker": AGENT_SPEAKER,
+            "customer_speaker": CUSTOMER_SPEAKER
+        }
+        # Rollups belong to the conversation's own project only: comparing against another
+        # builder's keywords must not count this call in that project's analytics
+        if settings.ANALYTICS_ROLLUPS_ENABLED and payload.match_mode == FUZZY:
+            agent_id = response["agent_id"]
+            for (set_project_id, set_builder_name), matched in results.items():
+                if set_project_id == conversation.project_id:
+                    safe_record_match_rollups(write_session, conversation_id, agent_id,
+                                              set_project_id, set_builder_name, matched, read_session=session)
+        return response
+
+    except SemanticUnavailable as e:
+        logger.warning("Semantic matching unavailable: %s", e)
+        return JSONResponse(
+            content={"Error code": "ERR-1010",
+                     "Error message": f"Semantic matching is not available on this server: {e}",
+                     "Conversation Id": f"{conversation_id}"},
+            status_code=503)
+
+    except Exception as e:
+        logger.exception("Error in fetch_keywords_match_multi")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/analytics/keywords", summary="Keyword hit counts per category, keyword, agent and speaker for a project and date range")
+def get_keyword_analytics(
+    project_id: int = Query(..., description="Project ID"),
+    builder_name: Optional[str] = Query(None, description="Builder name (case-insensitive)"),
+    date_from: Optional[date] = Query(None, description="First day (inclusive), YYYY-MM-DD. A conversation's day is the day it was first rolled up (see app/analytics/backfill.py)"),
+    date_to: Optional[date] = Query(None, description="Last day (inclusive), YYYY-MM-DD"),
+    agent_id: Optional[str] = Query(None, description="Restrict to one agent"),
+    category: Optional[str] = Query(None, description="Restrict to one category"),
+    session: Session = Depends(get_read_db),
+    key: str = Depends(rate_limited_key(INTERACTIVE))
+):
+    try:
+        if date_from and date_to and date_from > date_to:
+            return JSONResponse(
+                content={"Error code": "ERR-1009",
+                         "Error message": "date_from must not be after date_to",
+                         "Project id": f"{project_id}"},
+                status_code=400)
+
+        analytics = query_keyword_analytics(
+            session, project_id, builder_name=builder_name, date_from=date_from,
+            date_to=date_to, agent_id=agent_id, category=category)
+        return {
+            "project_id": project_id,
+            "builder_name": builder_name,
+            "date_from": date_from,
+            "date_to": date_to,
+            **analytics
+        }
+
+    except Exception as e:
+        logger.exception("Error while computing keyword analytics")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Pydantic model for keyword list
 class KeywordItem(BaseModel):
     category: str
@@ -209,13 +478,13 @@ class KeywordPayload(BaseModel):
     keywords: List[KeywordItem]
 
 
-@app.post("/keywords/replace", summary="Replace keywords as grouped JSON (category: [keywords]) for a builder and project")
+@router.post("/keywords/replace", summary="Replace keywords as grouped JSON (category: [keywords]) for a builder and project")
 def replace_keywords(
     project_id: int = Query(..., description="Project ID"),
     builder_name: str = Query(...,description="Builder name (case-sensitive)"),
     payload: KeywordPayload = ...,
     session: Session = Depends(get_db),
-    key: str = Depends(get_api_key)
+    key: str = Depends(rate_limited_key(INTERACTIVE))
 ):
     try:
         owner = get_api_owner(key, session)  #  Who's updating
@@ -237,30 +506,36 @@ def replace_keywords(
         # 🔁 Check existing keyword record
         existing = session.query(Keyword).filter(
             Keyword.project_id == project_id,
-            Keyword.builder_name.ilike(builder_name_clean)
+            func.lower(Keyword.builder_name) == builder_name_clean.lower()
         ).first()
 
-        # 🔧 Convert list to {category: [keywords]} dict
-        keyword_dict = defaultdict(list)
-        for item in payload.keywords:
-            category = item.category.strip()
-            keyword = item.keyword.strip()
-            if category and keyword:
-                keyword_dict[category].append(keyword)
+        # 🔧 Compile the list: normalize, dedupe, drop degenerate keywords, enforce size limits
+        try:
+            compiled, report = compile_keywords((item.category, item.keyword) for item in payload.keywords)
+        except KeywordCompileError as e:
+            return JSONResponse(
+                content={"Error code": "ERR-1011",
+                         "Error message": str(e),
+                         "Project id": f"{project_id}",
+                         "Builder Name": f"{builder_name}"},
+                status_code=400)
 
-        keyword_json = dict(keyword_dict)  # Convert from defaultdict
+        keyword_json = compiled.categorized
+        compiled_artifact = compiled.to_artifact()
 
         if existing:
             existing.keywords = keyword_json
+            existing.compiled = compiled_artifact
             existing.updated_on = datetime.utcnow()
             existing.updated_by = owner
             logger.info(
-                f"✅ Updated keywords for project_id = {project_id}, builder_name ='{builder_name}'")
+                "Updated keywords for project_id=%s, builder_name='%s'", project_id, builder_name)
         else:
             new_entry = Keyword(
                 project_id=project_id,
                 builder_name=builder_name_clean,
                 keywords=keyword_json,
+                compiled=compiled_artifact,
                 created_on=datetime.utcnow(),
                 created_by=owner,
                 updated_on=datetime.utcnow(),
@@ -268,14 +543,15 @@ def replace_keywords(
             )
             session.add(new_entry)
             logger.info(
-                f"Inserted new keywords for project_id={project_id}, builder_name='{builder_name}'")
+                "Inserted new keywords for project_id=%s, builder_name='%s'", project_id, builder_name)
 
         session.commit()
 
         return {
             "message": "Keywords successfully replaced.",
             "total_categories": len(keyword_json),
-            "total_keywords": sum(len(v) for v in keyword_json.values())
+            "total_keywords": sum(len(v) for v in keyword_json.values()),
+            **report
         }
 
     except Exception as e:
@@ -292,26 +568,26 @@ def replace_keywords(
 
 
 # GET Endpoint: All keywords grouped by category
-@app.get("/keywords", summary="Get keywords and categories for a builder and project")
+@router.get("/keywords", summary="Get keywords and categories for a builder and project")
 def get_keywords(
     project_id: int = Query(..., description="Project ID"),
     builder_name: str = Query(...,
                               description="Builder name (case-insensitive)"),
-    db: Session = Depends(get_db),
-    key: str = Depends(get_api_key)
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db),
+    key: str = Depends(rate_limited_key(INTERACTIVE))
 ):
     try:
         logger.info(
-            f"🔍 Fetching keywords for project_id={project_id}, builder_name={builder_name}")
+            "Fetching keywords for project_id=%s, builder_name=%s", project_id, builder_name)
 
-        keyword_entry = db.query(Keyword).filter(
-            and_(
-                Keyword.project_id == project_id,
-                Keyword.builder_name.ilike(builder_name.strip())
-            )
-        ).first()
+        keyword_filter = and_(
+            Keyword.project_id == project_id,
+            func.lower(Keyword.builder_name) == builder_name.strip().lower()
+        )
+        keyword_ref = db.query(Keyword.id, Keyword.updated_on).filter(keyword_filter).first()
 
-        if not keyword_entry:
+        if not keyword_ref:
             logger.warning("No keywords found for this builder and project.")
             return JSONResponse(
                 content={"Error code": "ERR-1005",
@@ -323,6 +599,17 @@ def get_keywords(
             # raise HTTPException(
             #     status_code=404, detail=f"No keywords found for this builder {builder_name} and project Id {project_id} .")
 
+        # The keyword set version decides the ETag, so unchanged sets skip loading and validating the JSONB
+        etag = make_etag("keywords", keyword_ref.id, keyword_ref.updated_on, builder_name)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        cache = get_response_cache()
+        cached_body = cache.get(etag)
+        if cached_body is not None:
+            return Response(content=cached_body, media_type="application/json", headers={"ETag": etag})
+
+        keyword_entry = db.query(Keyword).filter_by(id=keyword_ref.id).first()
+
         raw_keywords = keyword_entry.keywords
 
         # If it's a string (JSON), convert it
@@ -330,42 +617,44 @@ def get_keywords(
             try:
                 raw_keywords = json.loads(raw_keywords)
             except json.JSONDecodeError:
-                logger.error("❌ Invalid JSON format in keywords field.")
+                logger.error("Invalid JSON format in keywords field.")
                 raise HTTPException(
                     status_code=500, detail="Invalid keyword JSON format.")
 
         # Check final format is: Dict[str, List[str]]
         if not isinstance(raw_keywords, dict) or not all(isinstance(v, list) for v in raw_keywords.values()):
             logger.error(
-                f"❌ Keyword data is not a valid dictionary of lists. Got: {raw_keywords}")
+                "Keyword data is not a valid dictionary of lists. Got: %r", raw_keywords)
             raise HTTPException(
                 status_code=500, detail="Keyword data is not a valid category-keyword mapping.")
 
         logger.info(
-            f"✅ Returning keywords grouped under {len(raw_keywords)} categories.")
-        return {
+            "Returning keywords grouped under %d categories.", len(raw_keywords))
+        body = serialize_body({
             "project_id": project_id,
             "builder_name": builder_name,
             "keywords_by_category": raw_keywords
-        }
+        })
+        cache.set(etag, body)
+        return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
     except Exception as e:
-        logger.exception("🔥 Unexpected error while fetching keywords.")
+        logger.exception("Unexpected error while fetching keywords.")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/get_builder_name", summary="Get builder name from conversation and project")
+@router.get("/get_builder_name", summary="Get builder name from conversation and project")
 def get_builder_name(
     conversation_id: str = Query(..., description="The conversation ID"),
     project_id: int = Query(..., description="The project ID"),
-    session: Session = Depends(get_db),
+    session: Session = Depends(get_read_db),
     # Ensure only authenticated users can access this endpoint
-    key: str = Depends(get_api_key)
+    key: str = Depends(rate_limited_key(INTERACTIVE))
 ):
-    with TranscriptionSessionLocal() as session:
+    with session:
         try:
             logger.info(
-                f"Fetching builder_name for conversation_id={conversation_id}, project_id={project_id}")
+                "Fetching builder_name for conversation_id=%s, project_id=%s", conversation_id, project_id)
 
             # 1. Validate the conversation
             conversation = session.query(Conversation).filter_by(
@@ -396,7 +685,7 @@ def get_builder_name(
                          "Project id": f"{project_id}"},
                status_code=404)
 
-            logger.info(f"Found builder_name: {project.builder_name}")
+            logger.info("Found builder_name: %s", project.builder_name)
             return {
                 "project_id": project.id,
                 "builder_name": project.builder_name
@@ -407,17 +696,15 @@ def get_builder_name(
             raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/download_keywords_match_excel", summary="Download matched keywords as Excel")
+@router.post("/download_keywords_match_excel", summary="Download matched keywords as Excel")
 def download_keywords_match_excel(
     conversation_id: str = Query(...),
     project_id: int = Query(...),
     builder_name: str = Query(...),
-    session: Session = Depends(get_db),
-    key: str = Depends(get_api_key)
+    session: Session = Depends(get_read_db),
+    key: str = Depends(rate_limited_key(BULK))
 ):
     try:
-        owner = get_api_owner(key, session)
-
         # Step 1: Get conversation, project, transcription, and keywords
         conversation = session.query(Conversation).filter_by(
             conversation_id=conversation_id).first()
@@ -456,40 +743,44 @@ def download_keywords_match_excel(
             # raise HTTPException(404, detail="Keywords not found.")
 
         # Step 2: Prepare matching data
-        categorized_keywords = keyword_obj.keywords
-        agent_speakers = ["Speaker_1"]
-        customer_speakers = ["Speaker_0"]
+        keyword_set = load_keyword_set(keyword_obj)
+        agent_speakers = [AGENT_SPEAKER]
+        customer_speakers = [CUSTOMER_SPEAKER]
 
         records = []
 
-        def clean_text(txt):
-            return re.sub(r'[^a-zA-Z0-9 ]', '', txt.casefold()).strip().replace(" ", "")
+        # Whole-word phrase matching: every keyword is tokenized once and each
+        # segment scanned once (no space-stripped substring checks)
+        prepared = prepare_segments(diarized_segments)
+        hits = score_keywords(keyword_set.unique_clean, prepared, mode=PHRASE)
 
-        for category, keywords in categorized_keywords.items():
+        for category, keywords in keyword_set.categorized.items():
             for keyword in keywords:
-                keyword_clean = clean_text(keyword)
-                for segment in diarized_segments:
-                    speaker = segment.get("speaker")
-                    text = segment.get("text")
-                    text_clean = clean_text(text)
-                    if keyword_clean in text_clean:
-                        speaker_type = "Agent" if speaker in agent_speakers else "Customer" if speaker in customer_speakers else "Unknown"
-                        records.append({
-                            "project_id": project_id,
-                            "conversation_id": conversation_id,
-                            "builder_name": builder_name,
-                            "category": category,
-                            "keyword": keyword,
-                            "speaker": speaker_type,
-                            "count": 1,
-                            "matched_text": text
-                        })
+                for index in hits.get(keyword_set.clean(keyword), ()):
+                    speaker, text, _ = prepared[index]
+                    speaker_type = "Agent" if speaker in agent_speakers else "Customer" if speaker in customer_speakers else "Unknown"
+                    records.append({
+                        "project_id": project_id,
+                        "conversation_id": conversation_id,
+                        "builder_name": builder_name,
+                        "category": category,
+                        "keyword": keyword,
+                        "speaker": speaker_type,
+                        "count": 1,
+                        "matched_text": text
+                    })
+
+        from app.matching.summary import summarize_hits, summary_rows  # numpy, like pandas below
+        summary = summarize_hits(keyword_set, hits, prepared, diarized_segments, AGENT_SPEAKER, CUSTOMER_SPEAKER)
 
         # Step 3: Convert to Excel
+        import pandas as pd
+
         df = pd.DataFrame(records)
         output = io.BytesIO()
         with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
             df.to_excel(writer, sheet_name="Matched Keywords", index=False)
+            pd.DataFrame(summary_rows(summary)).to_excel(writer, sheet_name="Summary", index=False)
         output.seek(0)
 
         return StreamingResponse(output, media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
@@ -505,11 +796,41 @@ def download_keywords_match_excel(
                 status_code=404)
 
 
-@app.get("/List_keys", response_model=List[APIKeyInfo])
-async def list_api_keys(
-    db: Session = Depends(get_db),
+@router.get("/List_keys", response_model=List[APIKeyInfo])
+def list_api_keys(
+    db: Session = Depends(get_read_db),
     _: str = Depends(get_api_key)  # Only authenticated users can list keys
 ):
     """List all API keys (without showing the actual keys)."""
     keys = db.query(APIKey).all()
     return keys
+
+
+@asynccontextmanager
+async def lifespan(application: FastAPI):
+    setup_logging()  # restarts the listener if an earlier lifespan shut it down
+    report_missing_indexes()
+    yield
+    shutdown_logging()
+
+
+def create_app() -> FastAPI:
+    """Build the FastAPI application: the one place routers and startup hooks are registered."""
+    setup_logging()
+    application = FastAPI(
+        title="Comparative Transcription Service",
+        description="Compare diarization text with categorized keywords from DB",
+        version="1.0.0",
+        lifespan=lifespan
+    )
+    application.include_router(router)
+    application.include_router(api_key_router)
+    application.add_exception_handler(AdmissionRejected, admission_rejected_handler)
+    if settings.LOADTEST_RECORD_PATH:
+        from app.loadtest.recorder import TrafficRecorderMiddleware
+        application.add_middleware(TrafficRecorderMiddleware)
+    application.add_middleware(RequestContextMiddleware)
+    return application
+
+
+app = create_app()
@@ -0,0 +1,149 @@
+import re
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+from app.authentication.config import settings
+
+# Bump when the stored artifact layout changes; older artifacts are then recompiled on read
+COMPILED_FORMAT_VERSION = 1
+
+
+class KeywordCompileError(ValueError):
+    """The keyword list as a whole cannot be stored (e.g. it exceeds the size limits)."""
+
+
+def clean_text(text: str) -> str:
+    return re.sub(r'[^a-zA-Z0-9 ]', '', text.casefold()).strip()
+
+
+def normalize_keyword(keyword: str) -> str:
+    """clean_text plus collapsed whitespace, the identity used for deduplication."""
+    return " ".join(clean_text(keyword).split())
+
+
+class CompiledKeywordSet:
+    """
+    Ready-to-match keyword set.
+
+    ``categorized`` keeps the display spelling per category (what the API
+    returns), ``clean_map`` maps each display spelling to its normalized form
+    and ``memberships`` lists the categories of every normalized keyword, so
+    a keyword shared by several categories is matched once.
+    """
+
+    def __init__(self, categorized: Dict[str, List[str]], clean_map: Dict[str, str]):
+        self.categorized = categorized
+        self.clean_map = clean_map
+        memberships = defaultdict(list)
+        for category, keywords in categorized.items():
+            for keyword in keywords:
+                keyword_clean = clean_map[keyword]
+                if category not in memberships[keyword_clean]:
+                    memberships[keyword_clean].append(category)
+        self.memberships = dict(memberships)
+
+    @property
+    def unique_clean(self) -> List[str]:
+        return list(self.memberships)
+
+    def clean(self, keyword: str) -> str:
+        keyword_clean = self.clean_map.get(keyword)
+        return keyword_clean if keyword_clean is not None else clean_text(keyword)
+
+    def to_artifact(self) -> Dict[str, Any]:
+        """Stored form: only what from_artifact reads, memberships are cheap to rebuild."""
+        return {
+            "version": COMPILED_FORMAT_VERSION,
+            "clean_map": self.clean_map,
+            "categories": self.categorized,
+        }
+
+    @classmethod
+    def from_artifact(cls, artifact: Dict[str, Any]) -> "CompiledKeywordSet":
+        return cls(artifact["categories"], artifact["clean_map"])
+
+    @classmethod
+    def from_categorized(cls, categorized: Dict[str, List[str]]) -> "CompiledKeywordSet":
+        """Wrap a raw {category: [keywords]} mapping as-is (no deduplication), for rows without an artifact."""
+        clean_map = {}
+        for keywords in categorized.values():
+            for keyword in keywords:
+                if keyword not in clean_map:
+                    clean_map[keyword] = clean_text(keyword)
+        return cls(categorized, clean_map)
+
+
+def compile_keywords(items: Iterable[Tuple[str, str]]) -> Tuple[CompiledKeywordSet, Dict[str, Any]]:
+    """
+    Compile (category, keyword) pairs at write time.
+
+    - keywords are normalized (clean_text, collapsed whitespace)
+    - duplicates within a category (case / punctuation variants) keep the first spelling
+    - a keyword in several categories stays in each of them but is matched once
+    - keywords that normalize to nothing or to fewer than KEYWORD_MIN_LENGTH
+      characters are rejected and reported
+
+    Raises KeywordCompileError when the set exceeds the configured size limits.
+    Returns (compiled set, report).
+    """
+    categorized = defaultdict(list)
+    seen = defaultdict(set)
+    clean_map = {}
+    display_of = {}
+    rejected, duplicates = [], []
+
+    for category, keyword in items:
+        category = category.strip()
+        keyword = " ".join(keyword.split())
+        if not category or not keyword:
+            continue
+
+        keyword_clean = normalize_keyword(keyword)
+        if len(keyword_clean.replace(" ", "")) < settings.KEYWORD_MIN_LENGTH:
+            rejected.append({"category": category, "keyword": keyword,
+                             "reason": "empty or too short after normalization"})
+            continue
+        if len(keyword) > settings.KEYWORD_MAX_LENGTH:
+            rejected.append({"category": category, "keyword": keyword,
+                             "reason": f"longer than {settings.KEYWORD_MAX_LENGTH} characters"})
+            continue
+        if keyword_clean in seen[category]:
+            duplicates.append({"category": category, "keyword": keyword})
+            continue
+
+        # the first spelling of a normalized keyword is used in every category it appears in
+        display = display_of.setdefault(keyword_clean, keyword)
+        clean_map[display] = keyword_clean
+        seen[category].add(keyword_clean)
+        categorized[category].append(display)
+
+    compiled = CompiledKeywordSet(dict(categorized), clean_map)
+    total = sum(len(v) for v in compiled.categorized.values())
+    if total > settings.KEYWORD_MAX_COUNT:
+        raise KeywordCompileError(
+            f"{total} keywords exceed the limit of {settings.KEYWORD_MAX_COUNT} per builder and project")
+    if len(compiled.categorized) > settings.KEYWORD_MAX_CATEGORIES:
+        raise KeywordCompileError(
+            f"{len(compiled.categorized)} categories exceed the limit of {settings.KEYWORD_MAX_CATEGORIES}")
+
+    report = {
+        "unique_keywords": len(compiled.memberships),
+        "shared_keywords": sum(1 for c in compiled.memberships.values() if len(c) > 1),
+        "duplicates_removed": duplicates,
+        "rejected_keywords": rejected,
+    }
+    return compiled, report
+
+
+def load_keyword_set(keyword_obj) -> CompiledKeywordSet:
+    """Compiled set of a Keyword row: the stored artifact when current, otherwise compiled from the raw JSONB."""
+    artifact = getattr(keyword_obj, "compiled", None)
+    if isinstance(artifact, dict) and artifact.get("version") == COMPILED_FORMAT_VERSION:
+        return CompiledKeywordSet.from_artifact(artifact)
+    return CompiledKeywordSet.from_categorized(keyword_obj.keywords)
+
+
+def as_keyword_set(keywords: Union[CompiledKeywordSet, Dict[str, List[str]]]) -> CompiledKeywordSet:
+    if isinstance(keywords, CompiledKeywordSet):
+        return keywords
+    return CompiledKeywordSet.from_categorized(keywords)
@@ -0,0 +1,211 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from rapidfuzz import fuzz
+
+from app.matching.compiler import CompiledKeywordSet, as_keyword_set, clean_text
+from app.matching.phrase import PhraseMatcher
+
+# A compiled keyword set, or a raw {category: [keywords]} mapping
+KeywordSet = Union[CompiledKeywordSet, Dict[str, List[str]]]
+
+# Manually assigned diarization roles
+AGENT_SPEAKER = "Speaker_1"
+CUSTOMER_SPEAKER = "Speaker_0"
+
+# Minimum averaged fuzzy score for a segment to count as a keyword hit
+MATCH_THRESHOLD = 85
+
+# Matching modes: whole-segment fuzzy alignment (legacy), tokenized phrase matching,
+# or phrase matching plus embedding similarity for paraphrases
+FUZZY = "fuzzy"
+PHRASE = "phrase"
+SEMANTIC = "semantic"
+MATCH_MODES = (FUZZY, PHRASE, SEMANTIC)
+
+
+class SemanticUnavailable(Exception):
+    """Raised when semantic mode is requested but no embedding model can be loaded."""
+
+
+def get_fuzzy_score(keyword, text):
+    # rapidfuzz returns floats, round like fuzzywuzzy did so the 85 threshold keeps its meaning
+    partial = round(fuzz.partial_ratio(keyword, text))
+    token = round(fuzz.token_set_ratio(keyword, text))
+    return (partial + token) // 2  # average score
+
+
+def prepare_segments(diarized_segments: List[Dict[str, Any]]) -> List[Tuple[str, str, str]]:
+    """Clean every segment once: [(speaker, original text, cleaned text)]."""
+    prepared = []
+    for segment in diarized_segments:
+        text = segment.get("text", "") or ""
+        prepared.append((segment.get("speaker", ""), text, clean_text(text)))
+    return prepared
+
+
+def score_keywords(keywords_clean: Iterable[str], prepared, mode: str = FUZZY, slop: int = 0) -> Dict[str, List[int]]:
+    """
+    Score each distinct cleaned keyword against every segment exactly once.
+    Returns {cleaned keyword: [indexes of matching segments]}.
+    """
+    if mode == PHRASE:
+        return PhraseMatcher(keywords_clean, slop=slop).hits(prepared)
+    if mode == SEMANTIC:
+        return score_keywords_semantic(keywords_clean, prepared, slop)[0]
+    if mode != FUZZY:
+        raise ValueError(f"Unknown match mode: {mode}")
+
+    hits = {}
+    for keyword_clean in set(keywords_clean):
+        hits[keyword_clean] = [
+            index for index, (_, _, text_clean) in enumerate(prepared)
+            if get_fuzzy_score(keyword_clean, text_clean) >= MATCH_THRESHOLD
+        ]
+    return hits
+
+
+def score_keywords_semantic(
+    keywords_clean: Iterable[str],
+    prepared,
+    slop: int = 0,
+    segment_cache_key: Optional[str] = None
+) -> Tuple[Dict[str, List[int]], Dict[str, Dict[int, str]]]:
+    """
+    Phrase hits plus embedding-similarity hits.
+    Returns (hits, {cleaned keyword: {segment index: match type}}).
+    """
+    from app.matching.semantic import semantic_hits  # numpy + optional model, loaded only in this mode
+
+    keywords_clean = set(keywords_clean)
+    lexical = score_keywords(keywords_clean, prepared, PHRASE, slop)
+    semantic = semantic_hits(list(keywords_clean), prepared, segment_cache_key)
+
+    hits, match_types = {}, {}
+    for keyword_clean in keywords_clean:
+        kinds = {index: PHRASE for index in lexical.get(keyword_clean, ())}
+        for index in semantic.get(keyword_clean, ()):
+            kinds.setdefault(index, SEMANTIC)
+        hits[keyword_clean] = sorted(kinds)
+        match_types[keyword_clean] = kinds
+    return hits, match_types
+
+
+def _score(keywords_clean, prepared, mode, slop, segment_cache_key):
+    if mode == SEMANTIC:
+        return score_keywords_semantic(keywords_clean, prepared, slop, segment_cache_key)
+    return score_keywords(keywords_clean, prepared, mode, slop), None
+
+
+def build_matches(
+    keyword_set: KeywordSet,
+    hits: Dict[str, List[int]],
+    prepared,
+    agent_speaker: str = AGENT_SPEAKER,
+    customer_speaker: str = CUSTOMER_SPEAKER,
+    match_types: Optional[Dict[str, Dict[int, str]]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Turn segment hits back into the per-category ``matched_Keywords`` structure.
+    With ``match_types`` every text entry also carries its ``match_type``.
+    """
+    keyword_set = as_keyword_set(keyword_set)
+    result = []
+    for category, keyword_list in keyword_set.categorized.items():
+        keyword_matches = []
+
+        for keyword in keyword_list:
+            keyword_clean = keyword_set.clean(keyword)
+            types = match_types.get(keyword_clean, {}) if match_types is not None else None
+            agent_texts, customer_texts = [], []
+            for index in hits.get(keyword_clean, ()):
+                speaker, text, _ = prepared[index]
+                entry = {"text": text, "speaker": speaker}
+                if types is not None:
+                    entry["match_type"] = types.get(index)
+                if speaker == agent_speaker:
+                    agent_texts.append(entry)
+                elif speaker == customer_speaker:
+                    customer_texts.append(entry)
+
+            keyword_matches.append({
+                "keyword": keyword,
+                "countBySpeaker": {
+                    "Agent": {"count": len(agent_texts), "text": agent_texts},
+                    "Customer": {"count": len(customer_texts), "text": customer_texts}
+                }
+            })
+
+        result.append({
+            "category": category,
+            "keywords": keyword_matches
+        })
+    return result
+
+
+def match_keywords(
+    keyword_set: KeywordSet,
+    diarized_segments: List[Dict[str, Any]],
+    agent_speaker: str = AGENT_SPEAKER,
+    customer_speaker: str = CUSTOMER_SPEAKER,
+    mode: str = FUZZY,
+    slop: int = 0,
+    segment_cache_key: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Match one keyword set against a transcript.
+    ``segment_cache_key`` (e.g. the transcription id) lets semantic mode reuse cached segment embeddings.
+    """
+    keyword_set = as_keyword_set(keyword_set)
+    prepared = prepare_segments(diarized_segments)
+    hits, match_types = _score(keyword_set.unique_clean, prepared, mode, slop, segment_cache_key)
+    return build_matches(keyword_set, hits, prepared, agent_speaker, customer_speaker, match_types)
+
+
+def match_keywords_with_summary(
+    keyword_set: KeywordSet,
+    diarized_segments: List[Dict[str, Any]],
+    agent_speaker: str = AGENT_SPEAKER,
+    customer_speaker: str = CUSTOMER_SPEAKER,
+    mode: str = FUZZY,
+    slop: int = 0,
+    segment_cache_key: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    ``match_keywords`` plus the per-speaker / per-category summary built from
+    the same hits (see app/matching/summary.py).
+    """
+    from app.matching.summary import summarize_hits  # numpy
+
+    keyword_set = as_keyword_set(keyword_set)
+    prepared = prepare_segments(diarized_segments)
+    hits, match_types = _score(keyword_set.unique_clean, prepared, mode, slop, segment_cache_key)
+    result = build_matches(keyword_set, hits, prepared, agent_speaker, customer_speaker, match_types)
+    return result, summarize_hits(keyword_set, hits, prepared, diarized_segments, agent_speaker, customer_speaker)
+
+
+def match_keyword_sets(
+    keyword_sets: Dict[Any, KeywordSet],
+    diarized_segments: List[Dict[str, Any]],
+    agent_speaker: str = AGENT_SPEAKER,
+    customer_speaker: str = CUSTOMER_SPEAKER,
+    mode: str = FUZZY,
+    slop: int = 0,
+    segment_cache_key: Optional[str] = None
+) -> Tuple[Dict[Any, List[Dict[str, Any]]], int]:
+    """
+    Match several keyword sets (e.g. one per builder) in a single scoring pass.
+    Keywords shared between sets are scored once and the hits fanned back out.
+    Returns ({set key: matched_Keywords}, number of distinct keywords scored).
+    """
+    keyword_sets = {set_key: as_keyword_set(keyword_set) for set_key, keyword_set in keyword_sets.items()}
+    prepared = prepare_segments(diarized_segments)
+    union = set()
+    for keyword_set in keyword_sets.values():
+        union.update(keyword_set.unique_clean)
+    hits, match_types = _score(union, prepared, mode, slop, segment_cache_key)
+
+    results = {
+        set_key: build_matches(keyword_set, hits, prepared, agent_speaker, customer_speaker, match_types)
+        for set_key, keyword_set in keyword_sets.items()
+    }
+    return results, len(union)
@@ -0,0 +1,104 @@
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Sequence, Set, Tuple
+
+from rapidfuzz import fuzz, process
+
+# Per-token similarity needed for a fuzzy token match
+PHRASE_TOKEN_THRESHOLD = 85
+# Tokens shorter than this must match exactly ("emi" never matches inside "premium" or as "emit");
+# at 4 characters the threshold above still only admits a single inserted/dropped letter ("loan" ~ "loans")
+MIN_FUZZY_TOKEN_LENGTH = 4
+# Inflections accepted after a keyword token of at least MIN_FUZZY_TOKEN_LENGTH ("booked", "bookings")
+INFLECTION_SUFFIXES = ("s", "es", "ed", "ing", "ings")
+
+
+class PhraseMatcher:
+    """
+    Tokenized keyword matcher with word boundaries.
+
+    Keywords and segments are split into whole-word tokens. A keyword matches
+    when its tokens appear in order in the segment, each token matching exactly
+    or (for longer tokens) fuzzily or with a plural/verb suffix, with at most ``slop`` extra tokens in
+    between in total. Each segment is scanned once, token by token; keywords
+    are only checked at positions where their first token matches.
+    """
+
+    def __init__(
+        self,
+        keywords_clean: Iterable[str],
+        slop: int = 0,
+        token_threshold: int = PHRASE_TOKEN_THRESHOLD,
+        min_fuzzy_length: int = MIN_FUZZY_TOKEN_LENGTH
+    ):
+        self.slop = slop
+        self.token_threshold = token_threshold
+        self.min_fuzzy_length = min_fuzzy_length
+
+        self.phrases: Dict[str, Tuple[str, ...]] = {}
+        self.by_first_token = defaultdict(list)
+        for keyword_clean in set(keywords_clean):
+            tokens = tuple(keyword_clean.split())
+            self.phrases[keyword_clean] = tokens
+            if tokens:
+                self.by_first_token[tokens[0]].append(keyword_clean)
+
+        vocabulary = {token for tokens in self.phrases.values() for token in tokens}
+        self._fuzzy_vocabulary = [token for token in vocabulary if len(token) >= min_fuzzy_length]
+        self._vocabulary = vocabulary
+        # segment token -> keyword tokens it matches, shared across all segments of a transcript
+        self._token_cache: Dict[str, FrozenSet[str]] = {}
+
+    def _token_matches(self, token: str) -> FrozenSet[str]:
+        cached = self._token_cache.get(token)
+        if cached is not None:
+            return cached
+
+        matches = set()
+        if token in self._vocabulary:
+            matches.add(token)
+        for suffix in INFLECTION_SUFFIXES:
+            stem = token[:-len(suffix)]
+            if token.endswith(suffix) and len(stem) >= self.min_fuzzy_length and stem in self._vocabulary:
+                matches.add(stem)
+        if len(token) >= self.min_fuzzy_length and self._fuzzy_vocabulary:
+            for candidate, _, _ in process.extract(
+                    token, self._fuzzy_vocabulary, scorer=fuzz.ratio,
+                    score_cutoff=self.token_threshold, limit=None):
+                matches.add(candidate)
+        result = frozenset(matches)
+        self._token_cache[token] = result
+        return result
+
+    def _phrase_at(self, phrase: Tuple[str, ...], token_matches: Sequence[FrozenSet[str]], start: int) -> bool:
+        remaining = self.slop
+        position = start
+        for token in phrase[1:]:
+            # earliest next occurrence within the remaining slop (greedy is optimal for a total-gap budget)
+            limit = min(len(token_matches), position + 2 + remaining)
+            following = position + 1
+            while following < limit and token not in token_matches[following]:
+                following += 1
+            if following >= limit:
+                return False
+            remaining -= following - position - 1
+            position = following
+        return True
+
+    def segment_matches(self, text_clean: str) -> Set[str]:
+        """Cleaned keywords found in one cleaned segment."""
+        token_matches = [self._token_matches(token) for token in text_clean.split()]
+        found = set()
+        for start, matched in enumerate(token_matches):
+            for first_token in matched:
+                for keyword_clean in self.by_first_token.get(first_token, ()):
+                    if keyword_clean not in found and self._phrase_at(self.phrases[keyword_clean], token_matches, start):
+                        found.add(keyword_clean)
+        return found
+
+    def hits(self, prepared) -> Dict[str, List[int]]:
+        """Same shape as engine.score_keywords: {cleaned keyword: [matching segment indexes]}."""
+        hits = {keyword_clean: [] for keyword_clean in self.phrases}
+        for index, (_, _, text_clean) in enumerate(prepared):
+            for keyword_clean in self.segment_matches(text_clean):
+                hits[keyword_clean].append(index)
+        return hits
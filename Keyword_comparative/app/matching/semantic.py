@@ -0,0 +1,141 @@
+import hashlib
+import io
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.authentication.config import settings
+from app.cache.response_cache import LRUResponseCache, ResponseCache
+from app.matching.engine import SemanticUnavailable
+
+logger = logging.getLogger(__name__)
+
+# texts -> (n, dim) float array
+Embedder = Callable[[Sequence[str]], np.ndarray]
+
+_embedder: Optional[Embedder] = None
+_embedder_lock = threading.Lock()
+_embedding_cache: Optional[ResponseCache] = None
+
+
+def _load_sentence_transformer() -> Embedder:
+    try:
+        from sentence_transformers import SentenceTransformer  # optional dependency
+    except ImportError as e:
+        raise SemanticUnavailable("sentence-transformers is not installed") from e
+
+    model = SentenceTransformer(settings.SEMANTIC_MODEL_NAME, device="cpu")
+    logger.info("Loaded embedding model %s", settings.SEMANTIC_MODEL_NAME)
+
+    def embed(texts: Sequence[str]) -> np.ndarray:
+        return model.encode(list(texts), batch_size=64, convert_to_numpy=True, show_progress_bar=False)
+
+    return embed
+
+
+def get_embedder() -> Embedder:
+    """Load the local CPU embedding model once per process."""
+    global _embedder
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                _embedder = _load_sentence_transformer()
+    return _embedder
+
+
+def set_embedder(embedder: Optional[Embedder]) -> None:
+    """Swap the embedding function (e.g. a deterministic fake in local runs)."""
+    global _embedder
+    _embedder = embedder
+
+
+def get_embedding_cache() -> ResponseCache:
+    global _embedding_cache
+    if _embedding_cache is None:
+        _embedding_cache = LRUResponseCache(max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+                                            max_bytes=settings.EMBEDDING_CACHE_MAX_BYTES)
+    return _embedding_cache
+
+
+def set_embedding_cache(cache: ResponseCache) -> None:
+    """Use another cache backend, e.g. a RedisResponseCache shared between workers."""
+    global _embedding_cache
+    _embedding_cache = cache
+
+
+def _to_bytes(vectors: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    np.save(buffer, vectors, allow_pickle=False)
+    return buffer.getvalue()
+
+
+def _from_bytes(data: bytes) -> np.ndarray:
+    return np.load(io.BytesIO(data), allow_pickle=False)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def embed_cached(texts: Sequence[str], cache_key: str) -> np.ndarray:
+    """Embed ``texts`` once and keep the L2-normalized float32 matrix in the embedding cache."""
+    cache = get_embedding_cache()
+    key = f"emb:{settings.SEMANTIC_MODEL_NAME}:{cache_key}"
+    cached = cache.get(key)
+    if cached is not None:
+        return _from_bytes(cached)
+
+    if texts:
+        vectors = _normalize(get_embedder()(texts))
+    else:
+        vectors = np.zeros((0, 0), dtype=np.float32)
+    cache.set(key, _to_bytes(vectors))
+    return vectors
+
+
+def content_key(texts: Sequence[str]) -> str:
+    digest = hashlib.sha1()
+    for text in texts:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def semantic_hits(
+    keywords_clean: Sequence[str],
+    prepared,
+    segment_cache_key: Optional[str] = None,
+    threshold: Optional[float] = None
+) -> Dict[str, List[int]]:
+    """
+    Cosine-similarity matching of keywords against segments.
+
+    Keyword vectors are cached by the content of the (sorted) keyword list, so a
+    keyword set is embedded once per version; segment vectors are cached per
+    transcription (``segment_cache_key``) or, without one, by content.
+    Returns {cleaned keyword: [indexes of matching segments]}.
+    """
+    threshold = settings.SEMANTIC_THRESHOLD if threshold is None else threshold
+    keywords = sorted(set(k for k in keywords_clean if k))
+    hits = {keyword: [] for keyword in set(keywords_clean)}
+    if not keywords or not prepared:
+        return hits
+
+    segment_texts = [text_clean for _, _, text_clean in prepared]
+    keyword_vectors = embed_cached(keywords, "kw:" + content_key(keywords))
+    segment_vectors = embed_cached(
+        segment_texts, "seg:" + (segment_cache_key or content_key(segment_texts)))
+
+    # (segments x keywords) cosine similarities in one matrix product
+    similarity = segment_vectors @ keyword_vectors.T
+    segment_index, keyword_index = np.nonzero(similarity >= threshold)
+    for segment, keyword in zip(segment_index.tolist(), keyword_index.tolist()):
+        hits[keywords[keyword]].append(segment)
+    for keyword in keywords:
+        hits[keyword].sort()
+    return hits
@@ -0,0 +1,154 @@
+import json
+import logging
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.cache.response_cache import serialize_body
+from app.database.models import Transcription
+from app.matching.compiler import as_keyword_set
+from app.matching.engine import (AGENT_SPEAKER, CUSTOMER_SPEAKER, FUZZY, PHRASE, KeywordSet,
+                                 prepare_segments, score_keywords)
+from app.matching.phrase import PhraseMatcher
+
+logger = logging.getLogger(__name__)
+
+# Modes that can run chunk by chunk (semantic needs every segment embedded up front)
+CHUNKED_MODES = (FUZZY, PHRASE)
+
+_POSTGRES_SEGMENTS = text(
+    "SELECT t.elem FROM transcriptions tr "
+    "CROSS JOIN LATERAL jsonb_array_elements(tr.diarized_segments) WITH ORDINALITY AS t(elem, idx) "
+    "WHERE tr.transcription_id = :transcription_id ORDER BY t.idx")
+
+_SQLITE_SEGMENTS = text(
+    "SELECT j.value FROM transcriptions tr, json_each(tr.diarized_segments) AS j "
+    "WHERE tr.transcription_id = :transcription_id ORDER BY j.key")
+
+
+def iter_segment_chunks(session: Session, transcription_id: str, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Yield the diarized segments of one transcription in lists of ``chunk_size``.
+
+    On PostgreSQL the array is expanded server side and read through a
+    server-side cursor, so only one chunk is held in memory at a time.
+    """
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        statement = _POSTGRES_SEGMENTS
+    elif dialect == "sqlite":
+        statement = _SQLITE_SEGMENTS
+    else:
+        # No JSON array expansion available: load the column once and slice it
+        transcription = session.query(Transcription).filter_by(transcription_id=transcription_id).first()
+        segments = (transcription.diarized_segments if transcription else None) or []
+        for start in range(0, len(segments), chunk_size):
+            yield segments[start:start + chunk_size]
+        return
+
+    result = session.execute(
+        statement, {"transcription_id": transcription_id},
+        execution_options={"stream_results": True, "yield_per": chunk_size})
+    for partition in result.partitions(chunk_size):
+        chunk = []
+        for (element,) in partition:
+            chunk.append(json.loads(element) if isinstance(element, str) else element)
+        yield chunk
+
+
+class ChunkedMatchAccumulator:
+    """
+    Matches keyword sets chunk by chunk. Hit counts are exact; only the first
+    ``max_examples`` texts per keyword and speaker are kept.
+    """
+
+    def __init__(
+        self,
+        keyword_set: KeywordSet,
+        mode: str = FUZZY,
+        slop: int = 0,
+        max_examples: int = 20,
+        agent_speaker: str = AGENT_SPEAKER,
+        customer_speaker: str = CUSTOMER_SPEAKER
+    ):
+        if mode not in CHUNKED_MODES:
+            raise ValueError(f"Match mode {mode} cannot run in chunked mode")
+        self.keyword_set = as_keyword_set(keyword_set)
+        self.mode = mode
+        self.slop = slop
+        self.max_examples = max_examples
+        self.roles = {agent_speaker: "Agent", customer_speaker: "Customer"}
+        self.segments_seen = 0
+
+        self.keywords_clean = set(self.keyword_set.unique_clean)
+        # one matcher for the whole transcript so its token cache carries over between chunks
+        self._phrase_matcher = PhraseMatcher(self.keywords_clean, slop=slop) if mode == PHRASE else None
+        self._counts = {k: {"Agent": 0, "Customer": 0} for k in self.keywords_clean}
+        self._examples = {k: {"Agent": [], "Customer": []} for k in self.keywords_clean}
+
+    def add_chunk(self, segments: List[Dict[str, Any]]) -> None:
+        prepared = prepare_segments(segments)
+        if self._phrase_matcher is not None:
+            hits = self._phrase_matcher.hits(prepared)
+        else:
+            hits = score_keywords(self.keywords_clean, prepared, FUZZY)
+
+        for keyword_clean, indexes in hits.items():
+            counts = self._counts[keyword_clean]
+            examples = self._examples[keyword_clean]
+            for index in indexes:
+                speaker, segment_text, _ = prepared[index]
+                role = self.roles.get(speaker)
+                if role is None:
+                    continue
+                counts[role] += 1
+                if len(examples[role]) < self.max_examples:
+                    examples[role].append({"text": segment_text, "speaker": speaker})
+        self.segments_seen += len(segments)
+
+    def result(self) -> List[Dict[str, Any]]:
+        """The ``matched_Keywords`` structure; ``text`` lists are capped, ``count`` is not."""
+        result = []
+        for category, keyword_list in self.keyword_set.categorized.items():
+            keyword_matches = []
+            for keyword in keyword_list:
+                keyword_clean = self.keyword_set.clean(keyword)
+                counts = self._counts[keyword_clean]
+                examples = self._examples[keyword_clean]
+                keyword_matches.append({
+                    "keyword": keyword,
+                    "countBySpeaker": {
+                        role: {"count": counts[role], "text": list(examples[role])}
+                        for role in ("Agent", "Customer")
+                    }
+                })
+            result.append({"category": category, "keywords": keyword_matches})
+        return result
+
+
+def iter_json_response(
+    head: Dict[str, Any],
+    matched_keywords: List[Dict[str, Any]],
+    segment_chunks: Optional[Iterable[List[Dict[str, Any]]]],
+    tail: Dict[str, Any]
+) -> Iterator[bytes]:
+    """
+    Stream ``{**head, "matched_Keywords": ..., "diarized_text": [...], **tail}`` as JSON,
+    writing the transcript one chunk at a time.
+    """
+    yield serialize_body(head)[:-1]
+    yield b',"matched_Keywords":' + serialize_body(matched_keywords)
+    if segment_chunks is not None:
+        yield b',"diarized_text":['
+        first = True
+        for chunk in segment_chunks:
+            if not chunk:
+                continue
+            body = b",".join(serialize_body(segment) for segment in chunk)
+            yield body if first else b"," + body
+            first = False
+        yield b"]"
+    for name, value in tail.items():
+        yield b"," + serialize_body(name) + b":" + serialize_body(value)
+    yield b"}"
@@ -0,0 +1,135 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.matching.compiler import as_keyword_set
+from app.matching.engine import AGENT_SPEAKER, CUSTOMER_SPEAKER, KeywordSet
+
+# Speaker roles, in the order of the role axis of every count array
+ROLES = ("Agent", "Customer")
+_OTHER = len(ROLES)  # segments of any other speaker: kept out of the summary, like in matched_Keywords
+_NO_SEGMENT = np.iinfo(np.int64).max
+
+
+def _segment_times(diarized_segments: List[Dict[str, Any]]):
+    """(start, duration) arrays; NaN start / zero duration where a segment has no timestamps."""
+    start = np.full(len(diarized_segments), np.nan)
+    end = np.full(len(diarized_segments), np.nan)
+    for index, segment in enumerate(diarized_segments):
+        try:
+            start[index] = float(segment.get("start"))
+            end[index] = float(segment.get("end"))
+        except (TypeError, ValueError):
+            pass
+    duration = np.nan_to_num(np.clip(end - start, 0, None), nan=0.0)
+    return start, duration
+
+
+def _speaker_stats(count: int, talk_time: float, first_start: float, first_segment: int) -> Dict[str, Any]:
+    return {
+        "count": count,
+        "density_per_minute": round(count / (talk_time / 60), 3) if talk_time > 0 else None,
+        "first_occurrence": round(first_start, 2) if count and np.isfinite(first_start) else None,
+        "first_segment": first_segment if count else None,
+    }
+
+
+def summarize_hits(
+    keyword_set: KeywordSet,
+    hits: Dict[str, List[int]],
+    prepared,
+    diarized_segments: List[Dict[str, Any]],
+    agent_speaker: str = AGENT_SPEAKER,
+    customer_speaker: str = CUSTOMER_SPEAKER
+) -> Dict[str, Any]:
+    """
+    Per-speaker and per-category totals for a match result, computed on the
+    keyword x segment hit matrix (kept in coordinate form, one entry per hit)
+    and the speaker-role vector of the segments:
+
+    - ``count``: matching segments, summed over the category's keywords
+      (the sum of the ``countBySpeaker`` counts in ``matched_Keywords``)
+    - ``density_per_minute``: count per minute of that speaker's talk time
+    - ``first_occurrence`` / ``first_segment``: start time and index of the
+      earliest matching segment
+
+    Speaker totals count every distinct keyword once, even when it belongs to
+    several categories.
+    """
+    keyword_set = as_keyword_set(keyword_set)
+    keywords = keyword_set.unique_clean
+    categories = list(keyword_set.categorized)
+    n_keywords, n_roles = len(keywords), len(ROLES) + 1
+
+    role_of_speaker = {agent_speaker: 0, customer_speaker: 1}
+    roles = np.fromiter((role_of_speaker.get(speaker, _OTHER) for speaker, _, _ in prepared),
+                        dtype=np.int64, count=len(prepared))
+    start, duration = _segment_times(diarized_segments)
+    talk_time = np.bincount(roles, weights=duration, minlength=n_roles)
+
+    # Hit matrix in coordinate form: keyword row / segment column of every hit
+    lengths = np.fromiter((len(hits.get(keyword, ())) for keyword in keywords), dtype=np.int64, count=n_keywords)
+    rows = np.repeat(np.arange(n_keywords), lengths)
+    cols = np.fromiter((index for keyword in keywords for index in hits.get(keyword, ())),
+                       dtype=np.int64, count=int(lengths.sum()))
+    cells = rows * n_roles + roles[cols]
+
+    # keyword x role: hit counts, earliest start time, earliest segment index
+    counts = np.bincount(cells, minlength=n_keywords * n_roles).reshape(n_keywords, n_roles)
+    first_start = np.full(n_keywords * n_roles, np.inf)
+    np.fmin.at(first_start, cells, start[cols])
+    first_start = first_start.reshape(n_keywords, n_roles)
+    first_segment = np.full(n_keywords * n_roles, _NO_SEGMENT)
+    np.minimum.at(first_segment, cells, cols)
+    first_segment = first_segment.reshape(n_keywords, n_roles)
+
+    # category x keyword membership folds keyword rows into category rows
+    row_of_category = {category: index for index, category in enumerate(categories)}
+    membership = np.zeros((len(categories), n_keywords), dtype=bool)
+    for k, keyword in enumerate(keywords):
+        for category in keyword_set.memberships[keyword]:
+            membership[row_of_category[category], k] = True
+    category_counts = membership.astype(np.int64) @ counts
+    category_first_start = np.where(membership[:, :, None], first_start[None], np.inf).min(axis=1, initial=np.inf)
+    category_first_segment = np.where(membership[:, :, None], first_segment[None], _NO_SEGMENT).min(
+        axis=1, initial=_NO_SEGMENT)
+
+    def stats(count_row, first_start_row, first_segment_row):
+        return {
+            role: _speaker_stats(int(count_row[r]), float(talk_time[r]),
+                                 float(first_start_row[r]), int(first_segment_row[r]))
+            for r, role in enumerate(ROLES)
+        }
+
+    speakers = stats(counts.sum(axis=0), first_start.min(axis=0, initial=np.inf),
+                     first_segment.min(axis=0, initial=_NO_SEGMENT))
+    for r, role in enumerate(ROLES):
+        speakers[role]["keywords_matched"] = int(np.count_nonzero(counts[:, r]))
+
+    return {
+        "talk_time_seconds": {role: round(float(talk_time[r]), 2) for r, role in enumerate(ROLES)},
+        "speakers": speakers,
+        "categories": [
+            {
+                "category": category,
+                "total": int(category_counts[c, :len(ROLES)].sum()),
+                "bySpeaker": stats(category_counts[c], category_first_start[c], category_first_segment[c]),
+            }
+            for c, category in enumerate(categories)
+        ],
+    }
+
+
+def summary_rows(summary: Dict[str, Any]) -> List[Dict[str, Optional[Any]]]:
+    """Flatten a summary into one row per category and speaker (plus speaker totals) for the Excel export."""
+    rows = []
+    for category in summary["categories"]:
+        for role in ROLES:
+            rows.append({"category": category["category"], "speaker": role, **category["bySpeaker"][role]})
+    for role in ROLES:
+        totals = dict(summary["speakers"][role])
+        totals.pop("keywords_matched", None)
+        rows.append({"category": "(all categories)", "speaker": role, **totals})
+    for row in rows:
+        row["talk_time_seconds"] = summary["talk_time_seconds"][row["speaker"]]
+    return rows
@@ -0,0 +1,77 @@
+import os
+import sys
+
+# The app reads its settings at import time: point it at SQLite before anything imports it
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("STARTUP_INDEX_CHECK", "False")
+os.environ.setdefault("ENVIRONMENT", "testing")
+os.environ.setdefault("LOG_FORMAT", "text")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.loadtest.fixtures import register_sqlite_jsonb
+
+register_sqlite_jsonb()
+
+
+SEGMENTS = [
+    {"speaker": "Speaker_1", "text": "Your EMI is due", "start": 0.0, "end": 2.0},
+    {"speaker": "Speaker_0", "text": "What about the down payment?", "start": 2.0, "end": 5.0},
+    {"speaker": "Speaker_1", "text": "The down payment is ten percent", "start": 5.0, "end": 9.0},
+]
+
+
+@pytest.fixture
+def session_factory():
+    from app.database.models import Base, Project, Conversation, Transcription, Keyword, APIKey
+    from app.authentication.config import settings
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as session:
+        session.add(Project(id=1, name="Project 1", builder_name="Acme"))
+        session.add(Project(id=2, name="Project 2", builder_name="Other"))
+        session.add(Conversation(conversation_id="c1", agent_id="a1", project_id=1))
+        session.add(Transcription(transcription_id="t1", conversation_id="c1", transcript_text="text",
+                                  diarized_segments=SEGMENTS))
+        session.add(Keyword(project_id=1, builder_name="Acme",
+                            keywords={"Finance": ["EMI", "down payment"], "Greeting": ["hello"]}))
+        session.add(Keyword(project_id=2, builder_name="Other", keywords={"Finance": ["EMI"]}))
+        session.add(APIKey(key_id="master", key=settings.MASTER_API_KEY, owner_name="tests"))
+        session.commit()
+    yield factory
+    engine.dispose()
+
+
+@pytest.fixture
+def client(session_factory):
+    from fastapi.testclient import TestClient
+    from app.main import create_app
+    from app.database.database import get_db
+    from app.cache.response_cache import LRUResponseCache, set_response_cache
+    from app.authentication.authen import forget_api_keys
+
+    def override():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    set_response_cache(LRUResponseCache())
+    forget_api_keys()  # every test seeds its own database
+    app = create_app()
+    app.dependency_overrides[get_db] = override
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def api_headers():
+    from app.authentication.config import settings
+    return {"X-API-Key": settings.MASTER_API_KEY}
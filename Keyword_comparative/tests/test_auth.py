@@ -0,0 +1,60 @@
+import inspect
+
+from sqlalchemy import event
+
+from app.authentication.authen import forget_api_keys, get_api_key
+
+PARAMS = {"project_id": 1, "builder_name": "Acme"}
+HEADERS = {"X-API-Key": "user-key"}
+
+
+def add_key(session_factory):
+    from app.database.models import APIKey
+
+    with session_factory() as session:
+        session.add(APIKey(key_id="user", key="user-key", owner_name="tests", rate_limit_per_minute=7))
+        session.commit()
+
+
+def count_key_lookups(session_factory):
+    statements = []
+
+    @event.listens_for(session_factory.kw["bind"], "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "api_keys" in statement:
+            statements.append(statement.split()[0])
+
+    return statements
+
+
+def test_lookup_runs_in_the_threadpool():
+    assert not inspect.iscoroutinefunction(get_api_key)
+
+
+def test_validated_key_is_cached(client, session_factory):
+    add_key(session_factory)
+    statements = count_key_lookups(session_factory)
+
+    assert client.get("/keywords", params=PARAMS, headers=HEADERS).status_code == 200
+    # one lookup and the last_used write; limits are read before the commit, no reload
+    assert statements == ["SELECT", "UPDATE"]
+
+    assert client.get("/keywords", params=PARAMS, headers=HEADERS).status_code == 200
+    assert statements == ["SELECT", "UPDATE"]
+
+    forget_api_keys("user")
+    assert client.get("/keywords", params=PARAMS, headers=HEADERS).status_code == 200
+    assert statements == ["SELECT", "UPDATE", "SELECT", "UPDATE"]
+
+
+def test_invalid_keys_are_not_cached(client, session_factory):
+    assert client.get("/keywords", params=PARAMS, headers=HEADERS).status_code == 403
+    add_key(session_factory)
+    assert client.get("/keywords", params=PARAMS, headers=HEADERS).status_code == 200
+
+
+def test_deactivation_drops_the_cached_key(client, session_factory, api_headers):
+    add_key(session_factory)
+    assert client.get("/keywords", params=PARAMS, headers=HEADERS).status_code == 200
+    assert client.put("/keys/user/deactivate", headers=api_headers).status_code == 200
+    assert client.get("/keywords", params=PARAMS, headers=HEADERS).status_code == 403
@@ -0,0 +1,28 @@
+from types import SimpleNamespace
+
+from app.matching.compiler import CompiledKeywordSet, compile_keywords, load_keyword_set
+
+
+def test_compile_dedupes_and_shares_keywords():
+    compiled, report = compile_keywords([("Finance", "EMI"), ("Finance", "emi!"), ("Pricing", "E.M.I"),
+                                         ("Finance", "x")])
+    assert compiled.categorized == {"Finance": ["EMI"], "Pricing": ["EMI"]}
+    assert compiled.memberships == {"emi": ["Finance", "Pricing"]}
+    assert report["duplicates_removed"] == [{"category": "Finance", "keyword": "emi!"}]
+    assert [r["keyword"] for r in report["rejected_keywords"]] == ["x"]
+
+
+def test_artifact_round_trip():
+    compiled, _ = compile_keywords([("Finance", "Home  Loan"), ("Finance", "EMI"), ("Offers", "home loan")])
+    artifact = compiled.to_artifact()
+    assert set(artifact) == {"version", "clean_map", "categories"}
+
+    loaded = load_keyword_set(SimpleNamespace(compiled=artifact, keywords=None))
+    assert loaded.categorized == compiled.categorized
+    assert loaded.memberships == compiled.memberships
+
+
+def test_rows_without_artifact_compile_on_read():
+    loaded = load_keyword_set(SimpleNamespace(compiled=None, keywords={"Finance": ["EMI", "Down payment"]}))
+    assert isinstance(loaded, CompiledKeywordSet)
+    assert loaded.unique_clean == ["emi", "down payment"]
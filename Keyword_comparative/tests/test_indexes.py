@@ -0,0 +1,60 @@
+import logging
+
+from sqlalchemy import create_engine, text
+
+from app import main  # sets up logging on import, before caplog attaches its handler
+from app.authentication.config import settings
+from app.database.indexes import MIGRATION_INDEXES, check_indexes, expected_indexes, find_missing_indexes
+from app.database.models import Base
+
+
+def database():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def test_checks_only_indexes_the_migrations_create():
+    assert expected_indexes() == {table: sorted(names) for table, names in MIGRATION_INDEXES.items()}
+    for table, names in MIGRATION_INDEXES.items():
+        declared = {index.name for index in Base.metadata.tables[table].indexes}
+        assert set(names) <= declared
+    assert "ix_projects_id" not in expected_indexes()["projects"]
+
+
+def test_present_indexes_are_found():
+    assert find_missing_indexes(database()) == {}
+
+
+def test_missing_index_is_reported(caplog):
+    engine = database()
+    with engine.begin() as connection:
+        connection.execute(text("DROP INDEX ix_keywords_project_id_lower_builder_name"))
+        connection.execute(text("DROP INDEX ix_projects_id"))  # not owned by a migration, not reported
+
+    assert find_missing_indexes(engine) == {"keywords": ["ix_keywords_project_id_lower_builder_name"]}
+    with caplog.at_level(logging.WARNING):
+        assert check_indexes(engine) == {"keywords": ["ix_keywords_project_id_lower_builder_name"]}
+    assert "Missing indexes on 'keywords': ix_keywords_project_id_lower_builder_name" in caplog.text
+
+
+def test_missing_table_is_reported():
+    engine = create_engine("sqlite://")
+    assert find_missing_indexes(engine, tables=("projects",)) == {"projects": ["ix_projects_id_builder_name"]}
+
+
+def test_report_missing_indexes_at_startup(monkeypatch, caplog):
+    engine = database()
+    with engine.begin() as connection:
+        connection.execute(text("DROP INDEX ix_conversations_project_id"))
+    monkeypatch.setattr(main, "transcription_engine", engine)
+
+    monkeypatch.setattr(settings, "STARTUP_INDEX_CHECK", False)
+    with caplog.at_level(logging.WARNING):
+        main.report_missing_indexes()
+    assert "Missing indexes" not in caplog.text
+
+    monkeypatch.setattr(settings, "STARTUP_INDEX_CHECK", True)
+    with caplog.at_level(logging.WARNING):
+        main.report_missing_indexes()
+    assert "Missing indexes on 'conversations': ix_conversations_project_id" in caplog.text
@@ -0,0 +1,97 @@
+import asyncio
+import copy
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.loadtest.fixtures import FixtureCatalog, create_schema, generate_fixtures
+from app.loadtest.replay import WRITE_ENDPOINTS, replay, synthetic_traffic, without_writes
+from app.loadtest.report import OVERALL, compare_to_baseline, percentile, summarize
+
+
+def endpoints(entries):
+    return {(entry["method"], entry["endpoint"]) for entry in entries}
+
+
+def test_default_mix_is_read_only():
+    assert not endpoints(synthetic_traffic(500)) & WRITE_ENDPOINTS
+    assert ("POST", "/keywords/replace") in endpoints(synthetic_traffic(500, include_writes=True))
+
+
+def test_writes_are_dropped_from_recordings():
+    entries = [{"method": "POST", "endpoint": "/keywords/replace"},
+               {"method": "PUT", "endpoint": "/keys/{key_id}/deactivate"},
+               {"method": "GET", "endpoint": "/keywords"}]
+    assert without_writes(entries) == [{"method": "GET", "endpoint": "/keywords"}]
+
+
+def test_percentile_is_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert [percentile(values, pct) for pct in (50, 95, 99, 100)] == [50.0, 95.0, 99.0, 100.0]
+    assert percentile([], 50) == 0.0
+
+
+def replay_report(tmp_path, monkeypatch, requests=150, concurrency=4):
+    from app.authentication.config import settings
+    from app.database.database import get_db
+    from app.database.models import KeywordRollupSource
+    from app.main import create_app
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'loadtest.db'}", connect_args={"check_same_thread": False})
+    create_schema(engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as session:
+        generate_fixtures(session, projects=2, conversations_per_project=5, segments_per_conversation=(5, 30))
+        catalog = FixtureCatalog.from_db(session)
+
+    def override():
+        session = factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    monkeypatch.setattr(settings, "ANALYTICS_ROLLUPS_ENABLED", False)  # like app.loadtest.cli
+    app = create_app()
+    app.dependency_overrides[get_db] = override
+
+    async def run():
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+            return await replay(synthetic_traffic(requests, seed=3), catalog, client, concurrency=concurrency)
+
+    results, wall_seconds = asyncio.run(run())
+    with factory() as session:
+        rollups_written = session.query(KeywordRollupSource).count()
+    engine.dispose()
+    return summarize(results, wall_seconds, concurrency, 0.0), rollups_written
+
+
+def test_replay_against_the_app(tmp_path, monkeypatch):
+    report, rollups_written = replay_report(tmp_path, monkeypatch)
+
+    overall = report["endpoints"][OVERALL]
+    assert overall["requests"] == 150
+    assert overall["errors"] == 0
+    assert 0 < overall["p50_ms"] <= overall["p90_ms"] <= overall["p95_ms"] <= overall["p99_ms"] <= overall["max_ms"]
+    assert sum(stats["requests"] for name, stats in report["endpoints"].items() if name != OVERALL) == 150
+    assert "POST /fetch_keywords_match" in report["endpoints"]
+    assert rollups_written == 0
+
+    # a run is never a regression of itself
+    assert compare_to_baseline(report, report, min_requests=1) == []
+
+    # against a baseline twice as fast and error free, latency and errors are flagged
+    baseline = copy.deepcopy(report)
+    for stats in baseline["endpoints"].values():
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            stats[metric] = stats[metric] / 2
+    regressed = copy.deepcopy(report)
+    regressed["endpoints"][OVERALL]["error_rate"] = 0.5
+    regressions = compare_to_baseline(regressed, baseline, min_requests=1)
+    assert f"{OVERALL}: p95_ms {baseline['endpoints'][OVERALL]['p95_ms']} -> {overall['p95_ms']}" in regressions
+    assert f"{OVERALL}: error_rate 0.0 -> 0.5" in regressions
+
+    # endpoints with too few requests are not judged
+    assert compare_to_baseline(regressed, baseline, min_requests=10_000) == []
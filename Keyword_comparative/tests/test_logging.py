@@ -0,0 +1,87 @@
+import io
+import json
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import logging_config
+from app.authentication.config import settings
+from app.logging_config import REQUEST_ID_HEADER, _EnqueueHandler, shutdown_logging
+from app.main import create_app
+
+
+def test_logging_survives_repeated_lifespans(capsys):
+    shutdown_logging()  # the next setup binds its stream handler to the captured stderr
+    logger = logging.getLogger("tests.logging")
+    app = create_app()
+    for run in range(2):
+        with TestClient(app):
+            assert any(isinstance(h, _EnqueueHandler) for h in logging.getLogger().handlers)
+            logger.error("inside lifespan %d", run)
+        assert not any(isinstance(h, _EnqueueHandler) for h in logging.getLogger().handlers)
+        logger.error("after shutdown %d", run)
+
+    errors = capsys.readouterr().err
+    for run in range(2):
+        assert f"inside lifespan {run}" in errors
+        assert f"after shutdown {run}" in errors
+
+
+def test_shutdown_is_idempotent():
+    shutdown_logging()
+    shutdown_logging()
+    logging.getLogger("tests.logging").error("still logged")
+
+
+
+@pytest.fixture
+def logged_app(monkeypatch):
+    """An app with a route logging at every level; yields (app, buffer receiving the JSON lines)."""
+    monkeypatch.setattr(settings, "LOG_FORMAT", "json")
+    shutdown_logging()
+    app = create_app()
+    output = io.StringIO()
+    logging_config._output.setStream(output)
+
+    def noisy():
+        logger = logging.getLogger("tests.logging")
+        logger.info("info record")
+        logger.warning("warning record")
+        logger.error("error record")
+        return {"ok": True}
+
+    app.add_api_route("/_noisy", noisy)
+    yield app, output
+    shutdown_logging()
+
+
+def json_lines(output):
+    shutdown_logging()  # flushes the queue
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    return [line for line in lines if line["logger"] == "tests.logging"]
+
+
+def test_json_lines_carry_the_request_id(logged_app):
+    app, output = logged_app
+    with TestClient(app) as client:
+        echoed = client.get("/_noisy", headers={REQUEST_ID_HEADER: "req-123"}).headers[REQUEST_ID_HEADER]
+        generated = client.get("/_noisy").headers[REQUEST_ID_HEADER]
+    assert echoed == "req-123" and generated
+
+    lines = json_lines(output)
+    assert [line["request_id"] for line in lines] == ["req-123"] * 3 + [generated] * 3
+    assert [line["level"] for line in lines[:3]] == ["INFO", "WARNING", "ERROR"]
+    assert lines[0]["message"] == "info record"
+
+
+def test_sampled_out_requests_keep_warnings_and_errors(logged_app, monkeypatch):
+    app, output = logged_app
+    monkeypatch.setattr(settings, "LOG_INFO_SAMPLE_RATE", 0.0)
+    with TestClient(app) as client:
+        request_id = client.get("/_noisy").headers[REQUEST_ID_HEADER]
+
+    lines = json_lines(output)
+    assert [(line["level"], line["message"]) for line in lines] == [
+        ("WARNING", "warning record"), ("ERROR", "error record")]
+    assert all(line["request_id"] == request_id for line in lines)
@@ -0,0 +1,36 @@
+from app.database.models import KeywordRollupSource
+
+
+def multi(client, api_headers, keyword_sets, conversation_id="c1"):
+    return client.post("/fetch_keywords_match_multi", headers=api_headers,
+                       json={"conversation_id": conversation_id, "keyword_sets": keyword_sets})
+
+
+def test_multi_match_scores_every_set(client, api_headers):
+    response = multi(client, api_headers, [{"project_id": 1, "builder_name": "Acme"},
+                                           {"project_id": 2, "builder_name": "Other"}])
+    assert response.status_code == 200
+    sets = {s["builder_name"]: s["matched_Keywords"] for s in response.json()["keyword_sets"]}
+    assert set(sets) == {"Acme", "Other"}
+
+
+def test_multi_match_rollups_only_for_the_conversations_project(client, api_headers, session_factory):
+    response = multi(client, api_headers, [{"project_id": 1, "builder_name": "Acme"},
+                                           {"project_id": 2, "builder_name": "Other"}])
+    assert response.status_code == 200
+    with session_factory() as session:
+        sources = session.query(KeywordRollupSource.project_id, KeywordRollupSource.builder_name).all()
+    assert sources == [(1, "Acme")]
+
+
+def test_multi_match_rejects_unknown_builder(client, api_headers):
+    response = multi(client, api_headers, [{"project_id": 1, "builder_name": "Acme"},
+                                           {"project_id": 2, "builder_name": "Acme"}])
+    assert response.status_code == 404
+    assert response.json()["Error code"] == "ERR-1003"
+
+
+def test_multi_match_requires_the_conversations_project(client, api_headers):
+    response = multi(client, api_headers, [{"project_id": 2, "builder_name": "Other"}])
+    assert response.status_code == 404
+    assert response.json()["Error code"] == "ERR-1002"
@@ -0,0 +1,46 @@
+from app.matching.compiler import clean_text
+from app.matching.phrase import PhraseMatcher
+
+
+def matches(keyword, text, slop=0):
+    return clean_text(keyword) in PhraseMatcher([clean_text(keyword)], slop=slop).segment_matches(clean_text(text))
+
+
+def test_exact_phrase():
+    assert matches("down payment", "What about the down payment?")
+
+
+def test_word_boundaries():
+    assert matches("EMI", "your EMI is due")
+    assert not matches("EMI", "the premium plan")
+    assert not matches("EMI", "they emit light")
+
+
+def test_plurals_and_inflections():
+    assert matches("home loan", "home loans available")
+    assert matches("site visit", "we had two site visits")
+    assert matches("book", "I booked the flat")
+    assert matches("booking", "two bookings this week")
+    assert matches("visit", "after visiting the site")
+
+
+def test_short_tokens_stay_exact():
+    assert not matches("gym", "gyms")
+    assert not matches("loan", "load")
+
+
+def test_slop():
+    text = "down the payment"
+    assert not matches("down payment", text)
+    assert matches("down payment", text, slop=1)
+    assert not matches("down payment", "down is the payment", slop=1)
+    assert matches("down payment", "down is the payment", slop=2)
+
+
+def test_tokens_must_keep_order():
+    assert not matches("down payment", "payment down", slop=3)
+
+
+def test_hits_by_segment():
+    prepared = [("Speaker_1", text, clean_text(text)) for text in ("EMI due", "no match", "the EMI again")]
+    assert PhraseMatcher(["emi"]).hits(prepared) == {"emi": [0, 2]}
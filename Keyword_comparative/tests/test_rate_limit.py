@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from app.authentication.rate_limit import AdmissionRejected, KeyLimits, KeyRateLimiter, PriorityGate
+
+
+def limits(rate=60, burst=3, concurrency=2):
+    return KeyLimits(key_id="k", rate_per_minute=rate, burst=burst, max_concurrency=concurrency)
+
+
+def test_gcra_allows_burst_then_refills_at_rate():
+    limiter = KeyRateLimiter()
+    key = limits(rate=60, burst=3)  # one token per second, bucket of 3
+    for _ in range(3):
+        limiter.check_rate(key, now=100.0)
+    with pytest.raises(AdmissionRejected) as rejected:
+        limiter.check_rate(key, now=100.0)
+    assert rejected.value.retry_after == pytest.approx(1.0)
+
+    limiter.check_rate(key, now=101.0)  # one token refilled
+    with pytest.raises(AdmissionRejected):
+        limiter.check_rate(key, now=101.5)
+    limiter.check_rate(key, now=110.0)  # idle time refills the bucket, but never beyond the burst
+    limiter.check_rate(key, now=110.0)
+    limiter.check_rate(key, now=110.0)
+    with pytest.raises(AdmissionRejected):
+        limiter.check_rate(key, now=110.0)
+
+
+def test_rejected_requests_do_not_consume_tokens():
+    limiter = KeyRateLimiter()
+    key = limits(rate=60, burst=1)
+    limiter.check_rate(key, now=0.0)
+    for _ in range(5):
+        with pytest.raises(AdmissionRejected):
+            limiter.check_rate(key, now=0.5)
+    limiter.check_rate(key, now=1.0)
+
+
+def test_zero_rate_means_unlimited():
+    limiter = KeyRateLimiter()
+    for _ in range(1000):
+        limiter.check_rate(limits(rate=0, burst=1), now=0.0)
+
+
+def test_concurrency_cap_per_key():
+    limiter = KeyRateLimiter()
+    key = limits(concurrency=2)
+    limiter.acquire_slot(key)
+    limiter.acquire_slot(key)
+    with pytest.raises(AdmissionRejected):
+        limiter.acquire_slot(key)
+    limiter.release_slot(key)
+    limiter.acquire_slot(key)
+
+
+def test_priority_gate_queues_then_sheds():
+    async def scenario():
+        gate = PriorityGate("matching", max_in_flight=1, max_queue=1, max_wait=5)
+        await gate.acquire()
+        queued = asyncio.ensure_future(gate.acquire())
+        await asyncio.sleep(0)
+        assert not queued.done()
+
+        with pytest.raises(AdmissionRejected, match="saturated"):
+            await gate.acquire()
+
+        gate.release()  # hands the slot to the queued request
+        await asyncio.wait_for(queued, 1)
+        assert gate.in_flight == 1
+        gate.release()
+        assert gate.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_priority_gate_wait_timeout():
+    async def scenario():
+        gate = PriorityGate("bulk", max_in_flight=1, max_queue=4, max_wait=0.05)
+        await gate.acquire()
+        with pytest.raises(AdmissionRejected, match="timed out"):
+            await gate.acquire()
+        assert not gate._waiters  # the timed-out waiter left the queue
+        gate.release()
+        assert gate.in_flight == 0
+        await gate.acquire()  # the freed slot is usable again
+
+    asyncio.run(scenario())
+
+
+def test_429_uses_the_api_error_shape(client, session_factory):
+    from app.database.models import APIKey
+
+    with session_factory() as session:
+        session.add(APIKey(key_id="limited", key="limited-key", owner_name="tests",
+                           rate_limit_per_minute=1, rate_limit_burst=1))
+        session.commit()
+
+    headers = {"X-API-Key": "limited-key"}
+    params = {"project_id": 1, "builder_name": "Acme"}
+    assert client.get("/keywords", params=params, headers=headers).status_code == 200
+    response = client.get("/keywords", params=params, headers=headers)
+    assert response.status_code == 429
+    body = response.json()
+    assert body["Error code"] == "ERR-1008"
+    assert "detail" not in body
+    assert int(response.headers["Retry-After"]) == body["Retry after"] >= 1
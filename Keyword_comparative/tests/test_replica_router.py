@@ -0,0 +1,79 @@
+from app.database.database import ReplicaRouter
+
+
+class Probe:
+    """Lag probe with a fixed lag per replica; an exception stands for an unreachable replica."""
+
+    def __init__(self, lags):
+        self.lags = lags
+        self.calls = []
+
+    def __call__(self, engine):
+        self.calls.append(engine)
+        lag = self.lags[engine]
+        if isinstance(lag, Exception):
+            raise lag
+        return lag
+
+
+def router(lags, max_lag=5.0, check_interval=0.0):
+    return ReplicaRouter("primary", list(lags), max_lag=max_lag, check_interval=check_interval,
+                         lag_probe=Probe(lags))
+
+
+def test_round_robin_over_fresh_replicas():
+    replicas = router({"r1": 0.0, "r2": 1.0, "r3": 4.9})
+    assert [replicas.pick() for _ in range(6)] == ["r1", "r2", "r3", "r1", "r2", "r3"]
+
+
+def test_lagging_replica_is_skipped():
+    replicas = router({"r1": 0.0, "r2": 30.0})
+    assert [replicas.pick() for _ in range(4)] == ["r1", "r1", "r1", "r1"]
+
+
+def test_primary_when_every_replica_lags():
+    assert router({"r1": 30.0, "r2": 5.1}).pick() == "primary"
+
+
+def test_unreachable_replica_is_skipped():
+    replicas = router({"r1": ConnectionError("down"), "r2": 0.0})
+    assert [replicas.pick() for _ in range(3)] == ["r2", "r2", "r2"]
+    assert router({"r1": ConnectionError("down")}).pick() == "primary"
+
+
+def test_primary_without_replicas():
+    assert ReplicaRouter("primary", [], max_lag=5.0, check_interval=0.0).pick() == "primary"
+
+
+def test_lag_is_cached_for_the_check_interval():
+    replicas = router({"r1": 30.0, "r2": 0.0}, check_interval=3600)
+    for _ in range(5):
+        replicas.pick()
+    assert replicas.lag_probe.calls == ["r1", "r2"]
+
+    replicas.lag_probe.lags["r1"] = 0.0  # caught up, but not re-probed before the interval ends
+    assert replicas.pick() == "r2"
+
+
+def test_read_session_reuses_the_primary_session(monkeypatch):
+    from app.database import database
+
+    monkeypatch.setattr(database, "replica_router", ReplicaRouter("primary", [], max_lag=5.0, check_interval=0.0))
+    primary_session = object()
+    reads = database.get_read_db(primary_session)
+    assert next(reads) is primary_session
+    reads.close()
+
+
+def test_read_session_on_a_replica(monkeypatch):
+    from sqlalchemy import create_engine
+    from app.database import database
+
+    replica = create_engine("sqlite://")
+    monkeypatch.setattr(database, "replica_router",
+                        ReplicaRouter("primary", [replica], max_lag=5.0, check_interval=0.0, lag_probe=lambda e: 0.0))
+    primary_session = object()
+    reads = database.get_read_db(primary_session)
+    session = next(reads)
+    assert session is not primary_session and session.get_bind() is replica
+    reads.close()
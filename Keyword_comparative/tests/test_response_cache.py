@@ -0,0 +1,137 @@
+import time
+
+from app.cache import response_cache
+from app.cache.response_cache import LRUResponseCache, RedisResponseCache, etag_matches, make_etag
+
+
+class FakeRedis:
+    """In-memory stand-in for the redis-py calls the cache uses."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def set(self, key, value, ex=None):
+        self.data[key] = (value, time.monotonic() + ex if ex else None)
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+class BrokenRedis:
+    def get(self, key):
+        raise ConnectionError("down")
+
+    set = delete = get
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUResponseCache(max_entries=2)
+    cache.set("a", b"1")
+    cache.set("b", b"2")
+    assert cache.get("a") == b"1"  # "b" is now the oldest
+    cache.set("c", b"3")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1" and cache.get("c") == b"3"
+
+
+def test_lru_ttl_expires(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache = LRUResponseCache(default_ttl=10)
+    cache.set("a", b"1")
+    now[0] += 5
+    assert cache.get("a") == b"1"
+    now[0] += 6
+    assert cache.get("a") is None
+    assert len(cache) == 0 and cache.size_bytes == 0
+
+
+def test_lru_byte_budget():
+    cache = LRUResponseCache(max_entries=100, max_bytes=10)
+    cache.set("a", b"xxxx")
+    cache.set("b", b"yyyy")
+    cache.set("c", b"zzzz")  # 12 bytes > 10: "a" goes
+    assert cache.get("a") is None
+    assert cache.size_bytes == 8
+    cache.set("b", b"y")  # replacing an entry releases its old size
+    assert cache.size_bytes == 5
+
+
+def test_lru_skips_oversized_bodies():
+    cache = LRUResponseCache(max_entry_bytes=4)
+    cache.set("a", b"ok")
+    cache.set("a", b"too large")
+    assert cache.get("a") is None
+    assert cache.size_bytes == 0
+
+
+def test_redis_cache_with_fake_client():
+    client = FakeRedis()
+    cache = RedisResponseCache(client, prefix="t:", default_ttl=60, max_entry_bytes=5)
+    cache.set("k", b"body")
+    assert client.data["t:k"][0] == b"body"
+    assert cache.get("k") == b"body"
+    cache.set("big", b"too large")
+    assert cache.get("big") is None
+    cache.delete("k")
+    assert cache.get("k") is None
+
+
+def test_redis_outage_degrades_to_miss():
+    cache = RedisResponseCache(BrokenRedis())
+    cache.set("k", b"body")
+    assert cache.get("k") is None
+
+
+def test_etag_matching():
+    etag = make_etag("a", 1)
+    assert etag == make_etag("a", 1) != make_etag("a", 2)
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'W/{etag}, "other"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+
+
+def test_etag_changes_with_response_format(monkeypatch):
+    etag = make_etag("a", 1)
+    monkeypatch.setattr(response_cache, "RESPONSE_FORMAT_VERSION", response_cache.RESPONSE_FORMAT_VERSION + 1)
+    assert make_etag("a", 1) != etag
+    assert not etag_matches('"other"', etag)
+
+
+def test_keywords_not_modified(client, api_headers):
+    params = {"project_id": 1, "builder_name": "Acme"}
+    first = client.get("/keywords", params=params, headers=api_headers)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    again = client.get("/keywords", params=params, headers={**api_headers, "If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+
+    stale = client.get("/keywords", params=params, headers={**api_headers, "If-None-Match": '"stale"'})
+    assert stale.status_code == 200 and stale.content == first.content
+
+
+def test_match_not_modified_and_cached(client, api_headers):
+    params = {"conversation_id": "c1", "project_id": 1, "builder_name": "Acme"}
+    first = client.post("/fetch_keywords_match", params=params, headers=api_headers)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    cached = client.post("/fetch_keywords_match", params=params, headers=api_headers)
+    assert cached.content == first.content and cached.headers["ETag"] == etag
+
+    not_modified = client.post("/fetch_keywords_match", params=params,
+                               headers={**api_headers, "If-None-Match": etag})
+    assert not_modified.status_code == 304
@@ -0,0 +1,57 @@
+from datetime import date
+
+from app.analytics.backfill import backfill
+from app.analytics.rollups import query_keyword_analytics, record_match_rollups
+from app.database.models import Conversation, KeywordRollupSource, Transcription
+
+MATCHED = [{"category": "Finance", "keywords": [
+    {"keyword": "EMI", "countBySpeaker": {"Agent": {"count": 2, "text": []}, "Customer": {"count": 1, "text": []}}},
+]}]
+
+
+class NoWrites:
+    """A session that fails the test if the rollup code touches it."""
+
+    def __getattr__(self, name):
+        raise AssertionError(f"primary session used: {name}")
+
+
+def finance_totals(session, **filters):
+    analytics = query_keyword_analytics(session, 1, **filters)
+    return {row["category"]: row["countBySpeaker"] for row in analytics["totals_by_category"]}
+
+
+def test_recomputing_replaces_the_contribution(session_factory):
+    with session_factory() as session:
+        record_match_rollups(session, "c1", "a1", 1, "Acme", MATCHED)
+        record_match_rollups(session, "c1", "a1", 1, "Acme", MATCHED)  # same source row, no double count
+        assert finance_totals(session)["Finance"] == {"Agent": 2, "Customer": 1}
+
+        fewer = [{"category": "Finance", "keywords": [
+            {"keyword": "EMI", "countBySpeaker": {"Agent": {"count": 1, "text": []}, "Customer": {"count": 0, "text": []}}},
+        ]}]
+        record_match_rollups(session, "c1", "a1", 1, "Acme", fewer)
+        assert finance_totals(session)["Finance"] == {"Agent": 1, "Customer": 0}
+
+
+def test_unchanged_contribution_skips_the_primary(session_factory):
+    with session_factory() as session:
+        record_match_rollups(session, "c1", "a1", 1, "Acme", MATCHED)
+        record_match_rollups(NoWrites(), "c1", "a1", 1, "Acme", MATCHED, read_session=session)
+
+
+def test_backfill_rolls_up_every_conversation_once(session_factory):
+    with session_factory() as session:
+        session.add(Conversation(conversation_id="c2", agent_id="a2", project_id=1))
+        session.add(Transcription(transcription_id="t2", conversation_id="c2", transcript_text="text",
+                                  diarized_segments=[{"speaker": "Speaker_1", "text": "Your EMI is due"}]))
+        session.commit()
+
+        totals = backfill(session, project_id=1, day=date(2024, 5, 1))
+        assert totals[1] == {"conversations": 2, "skipped": 0}
+        sources = session.query(KeywordRollupSource).filter_by(project_id=1).all()
+        assert {s.conversation_id for s in sources} == {"c1", "c2"}
+        assert {s.day for s in sources} == {date(2024, 5, 1)}
+        assert finance_totals(session, date_from=date(2024, 5, 1), date_to=date(2024, 5, 1))["Finance"]["Agent"] > 0
+
+        assert backfill(session, project_id=1)[1] == {"conversations": 0, "skipped": 0}
@@ -0,0 +1,120 @@
+import hashlib
+import sys
+
+import numpy as np
+import pytest
+
+from app.authentication.config import settings
+from app.matching import semantic
+from app.matching.engine import (AGENT_SPEAKER, CUSTOMER_SPEAKER, PHRASE, SEMANTIC, match_keywords,
+                                 prepare_segments, score_keywords_semantic)
+
+DIMENSIONS = 512
+# Words with a shared meaning; every other word gets a dimension of its own
+CONCEPTS = {"emi": (1.0, 0.0, 0.0), "installment": (0.8, 0.6, 0.0), "hello": (0.0, 0.0, 1.0)}
+
+SEGMENTS = [
+    {"speaker": AGENT_SPEAKER, "text": "Your EMI is due"},
+    {"speaker": CUSTOMER_SPEAKER, "text": "Is the installment fixed"},
+    {"speaker": AGENT_SPEAKER, "text": "Nice weather today"},
+]
+
+
+class FakeEmbedder:
+    """Deterministic bag-of-words vectors: cos(emi, installment) = 0.8, unrelated words are orthogonal."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        vectors = np.zeros((len(texts), DIMENSIONS), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.split():
+                if word in CONCEPTS:
+                    vectors[row, :3] += CONCEPTS[word]
+                else:
+                    vectors[row, 3 + int(hashlib.sha1(word.encode()).hexdigest(), 16) % (DIMENSIONS - 3)] += 1
+        return vectors
+
+
+@pytest.fixture
+def embedder(monkeypatch):
+    fake = FakeEmbedder()
+    monkeypatch.setattr(semantic, "_embedding_cache", None)
+    semantic.set_embedder(fake)
+    yield fake
+    semantic.set_embedder(None)
+
+
+def test_threshold_is_applied(embedder, monkeypatch):
+    prepared = prepare_segments(SEGMENTS)
+    # "your emi is due": 1 of 4 words, cos 0.5; "is the installment fixed": cos 0.8 * 1/2 = 0.4
+    monkeypatch.setattr(settings, "SEMANTIC_THRESHOLD", 0.45)
+    assert semantic.semantic_hits(["emi"], prepared) == {"emi": [0]}
+    monkeypatch.setattr(settings, "SEMANTIC_THRESHOLD", 0.35)
+    assert semantic.semantic_hits(["emi"], prepared) == {"emi": [0, 1]}
+    assert semantic.semantic_hits(["emi"], prepared, threshold=0.6) == {"emi": []}
+
+
+def test_match_types(embedder, monkeypatch):
+    monkeypatch.setattr(settings, "SEMANTIC_THRESHOLD", 0.35)
+    hits, match_types = score_keywords_semantic(["emi"], prepare_segments(SEGMENTS))
+    assert hits == {"emi": [0, 1]}
+    assert match_types == {"emi": {0: PHRASE, 1: SEMANTIC}}
+
+    result = match_keywords({"Finance": ["EMI"]}, SEGMENTS, AGENT_SPEAKER, CUSTOMER_SPEAKER, mode=SEMANTIC)
+    emi = result[0]["keywords"][0]["countBySpeaker"]
+    assert emi["Agent"]["text"] == [{"text": "Your EMI is due", "speaker": AGENT_SPEAKER, "match_type": PHRASE}]
+    assert emi["Customer"]["text"] == [{"text": "Is the installment fixed", "speaker": CUSTOMER_SPEAKER,
+                                        "match_type": SEMANTIC}]
+
+
+def test_segment_vectors_are_reused_per_transcription(embedder):
+    prepared = prepare_segments(SEGMENTS)
+    semantic.semantic_hits(["emi", "hello"], prepared, segment_cache_key="t1")
+    assert len(embedder.calls) == 2  # keywords, then segments
+
+    semantic.semantic_hits(["emi", "hello"], prepared, segment_cache_key="t1")
+    semantic.semantic_hits(["hello"], prepared, segment_cache_key="t1")  # another keyword set, same transcript
+    assert embedder.calls[2:] == [["hello"]]
+
+    semantic.semantic_hits(["emi", "hello"], prepared, segment_cache_key="t2")
+    assert embedder.calls[3:] == [[text_clean for _, _, text_clean in prepared]]
+
+
+def test_semantic_endpoint(client, api_headers, embedder):
+    response = client.post("/fetch_keywords_match", headers=api_headers,
+                           params={"conversation_id": "c1", "project_id": 1, "builder_name": "Acme",
+                                   "match_mode": SEMANTIC})
+    assert response.status_code == 200
+    texts = [entry for category in response.json()["matched_Keywords"] for keyword in category["keywords"]
+             for stats in keyword["countBySpeaker"].values() for entry in stats["text"]]
+    assert texts and all(entry["match_type"] in (PHRASE, SEMANTIC) for entry in texts)
+
+
+def test_missing_model_package_is_a_503(client, api_headers, monkeypatch):
+    monkeypatch.setattr(semantic, "_embedding_cache", None)
+    semantic.set_embedder(None)
+    monkeypatch.setitem(sys.modules, "sentence_transformers", None)  # import fails
+
+    response = client.post("/fetch_keywords_match", headers=api_headers,
+                           params={"conversation_id": "c1", "project_id": 1, "builder_name": "Acme",
+                                   "match_mode": SEMANTIC})
+    assert response.status_code == 503
+    assert response.json()["Error code"] == "ERR-1010"
+
+
+def test_embedding_cache_is_bounded_by_bytes(monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_MAX_BYTES", 64 * 1024)
+    monkeypatch.setattr(semantic, "_embedding_cache", None)
+    monkeypatch.setattr(semantic, "_embedder", lambda texts: np.ones((len(texts), 384), dtype=np.float32))
+
+    for n in range(20):
+        vectors = semantic.embed_cached([f"segment {n}"] * 10, f"conversation-{n}")  # ~15 KB each
+        assert vectors.shape == (10, 384)
+
+    cache = semantic.get_embedding_cache()
+    assert 0 < cache.size_bytes <= 64 * 1024
+    assert cache.get(f"emb:{settings.SEMANTIC_MODEL_NAME}:conversation-19") is not None
+    assert cache.get(f"emb:{settings.SEMANTIC_MODEL_NAME}:conversation-0") is None
@@ -0,0 +1,27 @@
+import json
+import os
+import subprocess
+import sys
+
+# Importing the app (what every worker does at boot) must stay cheap
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "5"))
+HEAVY_MODULES = ("pandas", "xlsxwriter", "numpy", "fuzzywuzzy")
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+print(json.dumps({"elapsed": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def test_app_import_is_fast_and_lazy():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, "DATABASE_URL": "sqlite://", "STARTUP_INDEX_CHECK": "False"}
+    completed = subprocess.run([sys.executable, "-c", PROBE], cwd=root, env=env,
+                               capture_output=True, text=True, timeout=60)
+    assert completed.returncode == 0, completed.stderr
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    assert result["loaded"] == [], f"imported at startup: {result['loaded']}"
+    assert result["elapsed"] < STARTUP_BUDGET_SECONDS, f"app import took {result['elapsed']:.2f}s"
@@ -0,0 +1,127 @@
+import json
+
+import pytest
+
+from app.authentication.config import settings
+from app.matching.compiler import compile_keywords
+from app.matching.engine import AGENT_SPEAKER, CUSTOMER_SPEAKER, FUZZY, PHRASE, match_keywords
+from app.matching.streaming import ChunkedMatchAccumulator, iter_json_response
+
+PARAMS = {"conversation_id": "c1", "project_id": 1, "builder_name": "Acme"}
+
+LINES = ["Your EMI is due", "What about the down payment?", "hello there", "the premium plan",
+         "is the EMI fixed", "no down payment needed", "okay"]
+LONG_SEGMENTS = [
+    {"speaker": (AGENT_SPEAKER, CUSTOMER_SPEAKER, "Speaker_2")[n % 3], "text": LINES[n % len(LINES)],
+     "start": float(n), "end": n + 0.5}
+    for n in range(90)
+]
+
+
+def keyword_set():
+    compiled, _ = compile_keywords([("Finance", "EMI"), ("Finance", "down payment"), ("Greeting", "hello")])
+    return compiled
+
+
+def counts(matched_keywords):
+    return {(category["category"], keyword["keyword"], role): keyword["countBySpeaker"][role]["count"]
+            for category in matched_keywords for keyword in category["keywords"] for role in ("Agent", "Customer")}
+
+
+def accumulate(segments, chunk_size, mode=FUZZY, max_examples=None):
+    accumulator = ChunkedMatchAccumulator(
+        keyword_set(), mode=mode,
+        max_examples=settings.MAX_EXAMPLE_TEXTS_PER_KEYWORD if max_examples is None else max_examples)
+    for start in range(0, len(segments), chunk_size):
+        accumulator.add_chunk(segments[start:start + chunk_size])
+    return accumulator
+
+
+def test_counts_are_exact_while_examples_are_capped():
+    segments = [{"speaker": AGENT_SPEAKER, "text": f"EMI number {n}"} for n in range(settings.MAX_EXAMPLE_TEXTS_PER_KEYWORD + 15)]
+    emi = accumulate(segments, chunk_size=8).result()[0]["keywords"][0]["countBySpeaker"]["Agent"]
+    assert emi["count"] == settings.MAX_EXAMPLE_TEXTS_PER_KEYWORD + 15
+    assert len(emi["text"]) == settings.MAX_EXAMPLE_TEXTS_PER_KEYWORD
+    assert emi["text"][0]["text"] == "EMI number 0"  # the first hits are the ones kept
+
+    assert accumulate(segments, chunk_size=8, max_examples=0).result()[0]["keywords"][0][
+        "countBySpeaker"]["Agent"]["text"] == []
+
+
+@pytest.mark.parametrize("mode", [FUZZY, PHRASE])
+def test_chunk_size_does_not_change_the_result(mode):
+    one = accumulate(LONG_SEGMENTS, chunk_size=1, mode=mode)
+    whole = accumulate(LONG_SEGMENTS, chunk_size=len(LONG_SEGMENTS) + 10, mode=mode)
+    assert one.result() == whole.result()
+    assert one.segments_seen == whole.segments_seen == len(LONG_SEGMENTS)
+
+
+@pytest.mark.parametrize("mode", [FUZZY, PHRASE])
+def test_counts_match_the_unchunked_engine(mode):
+    expected = counts(match_keywords(keyword_set(), LONG_SEGMENTS, AGENT_SPEAKER, CUSTOMER_SPEAKER, mode=mode))
+    assert counts(accumulate(LONG_SEGMENTS, chunk_size=7, mode=mode).result()) == expected
+
+
+@pytest.fixture
+def long_conversation(session_factory):
+    from app.database.models import Conversation, Transcription
+
+    with session_factory() as session:
+        session.add(Conversation(conversation_id="long", agent_id="a1", project_id=1))
+        session.add(Transcription(transcription_id="t-long", conversation_id="long", transcript_text="text",
+                                  diarized_segments=LONG_SEGMENTS))
+        session.commit()
+    return {**PARAMS, "conversation_id": "long"}
+
+
+@pytest.mark.parametrize("mode", [FUZZY, PHRASE])
+def test_stream_endpoint_counts_match_fetch_keywords_match(client, api_headers, long_conversation, monkeypatch, mode):
+    params = {**long_conversation, "match_mode": mode}
+    full = client.post("/fetch_keywords_match", headers=api_headers, params=params)
+    assert full.status_code == 200
+
+    for chunk_size in (1, len(LONG_SEGMENTS) + 10):
+        monkeypatch.setattr(settings, "SEGMENT_CHUNK_SIZE", chunk_size)
+        streamed = client.post("/fetch_keywords_match_stream", headers=api_headers, params=params)
+        assert streamed.status_code == 200
+        body = streamed.json()
+        assert counts(body["matched_Keywords"]) == counts(full.json()["matched_Keywords"])
+        assert body["segments_processed"] == len(LONG_SEGMENTS)
+        assert body["diarized_text"] == LONG_SEGMENTS
+
+
+def test_stream_without_transcript(client, api_headers, long_conversation):
+    response = client.post("/fetch_keywords_match_stream", headers=api_headers,
+                           params={**long_conversation, "include_transcript": False})
+    body = response.json()
+    assert "diarized_text" not in body
+    assert body["agent_speaker"] == AGENT_SPEAKER and body["customer_speaker"] == CUSTOMER_SPEAKER
+
+
+@pytest.mark.parametrize("segment_chunks", [None, [], [[]], [LONG_SEGMENTS[:2], [], LONG_SEGMENTS[2:5]]])
+def test_iter_json_response_is_valid_json(segment_chunks):
+    head = {"status": "success", "conversation_id": "c\"1"}
+    matched = accumulate(LONG_SEGMENTS, chunk_size=10).result()
+    body = json.loads(b"".join(iter_json_response(head, matched, segment_chunks, {"agent_speaker": "Speaker_1"})))
+
+    assert body["status"] == "success" and body["conversation_id"] == "c\"1"
+    assert body["matched_Keywords"] == matched
+    assert body["agent_speaker"] == "Speaker_1"
+    if segment_chunks is None:
+        assert "diarized_text" not in body
+    else:
+        assert body["diarized_text"] == [segment for chunk in segment_chunks for segment in chunk]
+
+
+def test_stream_caps_examples(client, api_headers):
+    response = client.post("/fetch_keywords_match_stream", headers=api_headers,
+                           params={**PARAMS, "max_examples": settings.MAX_EXAMPLE_TEXTS_PER_KEYWORD + 1})
+    assert response.status_code == 422
+
+    response = client.post("/fetch_keywords_match_stream", headers=api_headers,
+                           params={**PARAMS, "max_examples": 1})
+    assert response.status_code == 200
+    for category in response.json()["matched_Keywords"]:
+        for keyword in category["keywords"]:
+            for stats in keyword["countBySpeaker"].values():
+                assert len(stats["text"]) <= 1
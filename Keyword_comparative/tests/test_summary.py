@@ -0,0 +1,133 @@
+import io
+import math
+
+import pytest
+
+from app.matching.compiler import compile_keywords
+from app.matching.engine import AGENT_SPEAKER, CUSTOMER_SPEAKER, FUZZY, PHRASE, match_keywords_with_summary
+from app.matching.summary import ROLES, summary_rows
+
+SEGMENTS = [
+    {"speaker": AGENT_SPEAKER, "text": "Your EMI is due", "start": 0.0, "end": 4.0},
+    {"speaker": CUSTOMER_SPEAKER, "text": "What is the EMI and the down payment", "start": 4.0, "end": 10.0},
+    {"speaker": AGENT_SPEAKER, "text": "The down payment is ten percent"},  # no timestamps
+    {"speaker": "Speaker_2", "text": "EMI EMI", "start": 10.0, "end": 12.0},  # neither agent nor customer
+    {"speaker": CUSTOMER_SPEAKER, "text": "thanks, hello", "start": "n/a", "end": None},
+]
+
+
+def keyword_set():
+    compiled, _ = compile_keywords([("Finance", "EMI"), ("Finance", "down payment"),
+                                    ("Pricing", "EMI"), ("Greeting", "hello")])
+    return compiled
+
+
+def by_category(summary):
+    return {entry["category"]: entry for entry in summary["categories"]}
+
+
+@pytest.mark.parametrize("mode", [FUZZY, PHRASE])
+def test_totals_match_matched_keywords(mode):
+    result, summary = match_keywords_with_summary(keyword_set(), SEGMENTS, mode=mode)
+    categories = by_category(summary)
+    distinct = {}
+    for category in result:
+        entry = categories[category["category"]]
+        for role in ROLES:
+            count = sum(k["countBySpeaker"][role]["count"] for k in category["keywords"])
+            assert entry["bySpeaker"][role]["count"] == count
+        assert entry["total"] == sum(k["countBySpeaker"][role]["count"]
+                                     for k in category["keywords"] for role in ROLES)
+        for k in category["keywords"]:
+            distinct[k["keyword"]] = k["countBySpeaker"]
+    for role in ROLES:
+        assert summary["speakers"][role]["count"] == sum(counts[role]["count"] for counts in distinct.values())
+
+
+def test_summary_values():
+    _, summary = match_keywords_with_summary(keyword_set(), SEGMENTS)
+    categories = by_category(summary)
+
+    assert summary["talk_time_seconds"] == {"Agent": 4.0, "Customer": 6.0}
+    assert summary["speakers"]["Agent"] == {"count": 2, "density_per_minute": 30.0, "first_occurrence": 0.0,
+                                            "first_segment": 0, "keywords_matched": 2}
+    assert summary["speakers"]["Customer"] == {"count": 3, "density_per_minute": 30.0, "first_occurrence": 4.0,
+                                               "first_segment": 1, "keywords_matched": 3}
+
+    # EMI belongs to Finance and Pricing and counts in both, but once in the speaker totals
+    assert categories["Finance"]["total"] == 4
+    assert categories["Pricing"]["total"] == 2
+    assert categories["Pricing"]["bySpeaker"]["Agent"]["count"] == 1
+
+    # the other speaker's EMI segment is kept out of every count
+    assert sum(entry["total"] for entry in categories.values()) == 7
+
+
+def test_segments_without_timestamps():
+    _, summary = match_keywords_with_summary(keyword_set(), SEGMENTS)
+    greeting = by_category(summary)["Greeting"]["bySpeaker"]["Customer"]
+    # the only hello segment has no usable start: it is counted and located, but has no time
+    assert greeting["count"] == 1
+    assert greeting["first_occurrence"] is None
+    assert greeting["first_segment"] == 4
+
+
+def test_zero_talk_time_has_no_density():
+    untimed = [{"speaker": s["speaker"], "text": s["text"]} for s in SEGMENTS]
+    _, summary = match_keywords_with_summary(keyword_set(), untimed)
+    assert summary["talk_time_seconds"] == {"Agent": 0.0, "Customer": 0.0}
+    for role in ROLES:
+        stats = summary["speakers"][role]
+        assert stats["count"] > 0
+        assert stats["density_per_minute"] is None
+        assert stats["first_occurrence"] is None
+
+
+def test_empty_keyword_set():
+    empty, _ = compile_keywords([])
+    result, summary = match_keywords_with_summary(empty, SEGMENTS)
+    assert result == [] and summary["categories"] == []
+    assert summary["talk_time_seconds"] == {"Agent": 4.0, "Customer": 6.0}
+    for role in ROLES:
+        assert summary["speakers"][role] == {"count": 0, "density_per_minute": 0.0, "first_occurrence": None,
+                                             "first_segment": None, "keywords_matched": 0}
+
+
+def test_empty_transcript():
+    _, summary = match_keywords_with_summary(keyword_set(), [])
+    assert summary["talk_time_seconds"] == {"Agent": 0.0, "Customer": 0.0}
+    for entry in summary["categories"]:
+        assert entry["total"] == 0
+        for stats in entry["bySpeaker"].values():
+            assert stats == {"count": 0, "density_per_minute": None, "first_occurrence": None, "first_segment": None}
+
+
+def test_summary_rows():
+    _, summary = match_keywords_with_summary(keyword_set(), SEGMENTS)
+    rows = summary_rows(summary)
+    assert len(rows) == len(summary["categories"]) * len(ROLES) + len(ROLES)
+    assert rows[0] == {"category": "Finance", "speaker": "Agent", "count": 2, "density_per_minute": 30.0,
+                       "first_occurrence": 0.0, "first_segment": 0, "talk_time_seconds": 4.0}
+    totals = [row for row in rows if row["category"] == "(all categories)"]
+    assert [(row["speaker"], row["count"]) for row in totals] == [("Agent", 2), ("Customer", 3)]
+    assert all("keywords_matched" not in row for row in rows)
+
+
+def test_excel_summary_sheet(client, api_headers):
+    pd = pytest.importorskip("pandas")
+    pytest.importorskip("openpyxl")
+
+    response = client.post("/download_keywords_match_excel", headers=api_headers,
+                           params={"conversation_id": "c1", "project_id": 1, "builder_name": "Acme"})
+    assert response.status_code == 200
+    sheets = pd.read_excel(io.BytesIO(response.content), sheet_name=None)
+    assert set(sheets) == {"Matched Keywords", "Summary"}
+
+    summary = sheets["Summary"]
+    assert list(summary.columns) == ["category", "speaker", "count", "density_per_minute",
+                                     "first_occurrence", "first_segment", "talk_time_seconds"]
+    # conftest set: Finance (EMI, down payment) and Greeting (hello), two roles each, plus the totals
+    assert len(summary) == 3 * 2
+    finance = summary[summary["category"] == "Finance"].set_index("speaker")["count"].to_dict()
+    assert finance == {"Agent": 2, "Customer": 1}
+    assert not any(isinstance(v, float) and math.isinf(v) for v in summary["density_per_minute"])